@@ -0,0 +1,103 @@
+"""Per-request cost of encrypted Feishu callbacks on the ack path.
+
+Times signature check + decrypt for a burst of callbacks, with the AES key
+derived once (what the server does) and per request (for comparison), single
+threaded and from a thread pool. Needs `cryptography`.
+
+    python benchmarks/feishu_crypto_bench.py --burst 5000 --threads 1 8 32
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openclaw.feishu_crypto import FeishuCipher, encrypt_payload  # noqa: E402
+from openclaw.ledger import percentile  # noqa: E402
+
+KEY = "bench-encrypt-key"
+
+Request = Tuple[str, str, bytes, str]
+
+
+def make_burst(n: int) -> List[Request]:
+    signer = FeishuCipher(KEY)
+    out: List[Request] = []
+    for i in range(n):
+        event = {
+            "schema": "2.0",
+            "header": {"event_id": uuid.uuid4().hex, "event_type": "im.message.receive_v1"},
+            "event": {
+                "message": {
+                    "chat_id": "oc_bench",
+                    "message_type": "text",
+                    "content": json.dumps({"text": f"查询 {i} 近3天"}, ensure_ascii=False),
+                }
+            },
+        }
+        body = json.dumps({"encrypt": encrypt_payload(KEY, event, os.urandom(16))}).encode()
+        ts, nonce = str(int(time.time())), uuid.uuid4().hex
+        out.append((ts, nonce, body, signer.signature(ts, nonce, body)))
+    return out
+
+
+def handle(cipher: FeishuCipher, req: Request) -> None:
+    # mirrors FeishuHandler.do_POST up to the ack
+    ts, nonce, body, signature = req
+    if not cipher.verify(ts, nonce, body, signature):
+        raise RuntimeError("signature mismatch")
+    cipher.decrypt(json.loads(body)["encrypt"])
+
+
+def run(burst: List[Request], threads: int, per_request: Callable[[Request], None]) -> dict:
+    latencies: List[float] = []
+
+    def _one(req: Request) -> None:
+        t0 = time.perf_counter()
+        per_request(req)
+        latencies.append((time.perf_counter() - t0) * 1e6)
+
+    start = time.perf_counter()
+    if threads == 1:
+        for req in burst:
+            _one(req)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(_one, burst))
+    elapsed = time.perf_counter() - start
+    return {
+        "req_per_s": round(len(burst) / elapsed),
+        "p50_us": round(percentile(latencies, 50), 1),
+        "p99_us": round(percentile(latencies, 99), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=5000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    burst = make_burst(args.burst)
+    cached = FeishuCipher(KEY)
+    modes = {
+        "plaintext_json": lambda req: json.loads(req[2]),
+        "cached_key": lambda req: handle(cached, req),
+        "derive_per_request": lambda req: handle(FeishuCipher(KEY), req),
+    }
+    for threads in args.threads:
+        for name, fn in modes.items():
+            result = run(burst, threads, fn)
+            print(json.dumps({"mode": name, "threads": threads, "burst": args.burst, **result}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Load test for the Feishu callback server, entirely on localhost.
+
+Starts stub Feishu and Bilibili APIs, launches `openclaw.server` against them
+with a throwaway data dir, replays synthetic callbacks at fixed rates and
+reports ack throughput, latency percentiles, server threads and RSS.
+
+    python benchmarks/feishu_loadtest.py --rates 50 200 500 --duration 10
+
+Pass --encrypt-key to send encrypted, signed callbacks (needs `cryptography`).
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openclaw.ledger import percentile  # noqa: E402
+
+TOKEN = "loadtest-token"
+STUB_LATENCY = 0.02
+
+WBI = {
+    "img_url": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png",
+    "sub_url": "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png",
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Answers the handful of Feishu/Bilibili endpoints the server path touches.
+    protocol_version = "HTTP/1.1"
+    calls: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args) -> None:
+        return
+
+    def _reply(self, data: dict) -> None:
+        path = self.path.split("?", 1)[0]
+        with self.lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+        time.sleep(STUB_LATENCY)
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        now = int(time.time())
+        if path == "/x/web-interface/nav":
+            self._reply({"code": -101, "data": {"wbi_img": WBI}})
+        elif path == "/x/space/wbi/acc/info":
+            self._reply({"code": 0, "data": {"mid": 1, "name": "stub-up"}})
+        elif path == "/x/relation/stat":
+            self._reply({"code": 0, "data": {"follower": 1234}})
+        elif path == "/x/space/wbi/arc/search":
+            vlist = [
+                {"bvid": f"BVstub{i}", "title": f"video {i}", "created": now - i * 3600, "mid": 1}
+                for i in range(10)
+            ]
+            self._reply({"code": 0, "data": {"list": {"vlist": vlist}}})
+        elif path == "/x/web-interface/wbi/search/type":
+            self._reply({"code": 0, "data": {"result": [{"mid": 1, "uname": "stub-up"}]}})
+        else:
+            self._reply({"code": -404})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", "0"))
+        self.rfile.read(length)
+        if self.path.endswith("/tenant_access_token/internal"):
+            self._reply({"code": 0, "tenant_access_token": "t-stub", "expire": 7200})
+        else:
+            self._reply({"code": 0, "data": {}})
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _text_event(text: str, event_id: str | None = None, token: str = TOKEN) -> dict:
+    return {
+        "schema": "2.0",
+        "header": {
+            "event_id": event_id or uuid.uuid4().hex,
+            "event_type": "im.message.receive_v1",
+            "token": token,
+        },
+        "event": {
+            "message": {
+                "chat_id": "oc_loadtest",
+                "message_type": "text",
+                "content": json.dumps({"text": text}, ensure_ascii=False),
+            }
+        },
+    }
+
+
+def make_payloads(n: int, seed: int = 1) -> List[dict]:
+    # mix: valid text, bad token, url_verification, non-text, duplicate ids
+    rng = random.Random(seed)
+    recent: List[str] = []
+    out: List[dict] = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.6:
+            payload = _text_event(f"查询 {rng.randint(1, 50)} 近3天")
+            recent.append(payload["header"]["event_id"])
+        elif r < 0.7:
+            payload = _text_event("查询 1 近3天", token="wrong")
+        elif r < 0.8:
+            payload = {"type": "url_verification", "token": TOKEN, "challenge": uuid.uuid4().hex}
+        elif r < 0.9:
+            payload = _text_event("")
+            payload["event"]["message"]["message_type"] = "image"
+        else:
+            payload = _text_event("查询 1 近3天", event_id=rng.choice(recent) if recent else None)
+        out.append(payload)
+    return out
+
+
+def encode_payloads(payloads: List[dict], encrypt_key: str = "") -> List[tuple]:
+    # (body, headers) pairs; encryption happens up front so it isn't timed
+    if not encrypt_key:
+        return [(json.dumps(p, ensure_ascii=False).encode("utf-8"), {}) for p in payloads]
+    from openclaw.feishu_crypto import FeishuCipher, encrypt_payload
+
+    signer = FeishuCipher(encrypt_key)
+    out = []
+    for p in payloads:
+        body = json.dumps({"encrypt": encrypt_payload(encrypt_key, p, os.urandom(16))}).encode()
+        headers = {}
+        if p.get("type") != "url_verification":
+            ts, nonce = str(int(time.time())), uuid.uuid4().hex
+            headers = {
+                "X-Lark-Request-Timestamp": ts,
+                "X-Lark-Request-Nonce": nonce,
+                "X-Lark-Signature": signer.signature(ts, nonce, body),
+            }
+        out.append((body, headers))
+    return out
+
+
+def _proc_status(pid: int) -> Dict[str, int]:
+    # Linux only; other platforms report zeros
+    info = {"threads": 0, "rss_kb": 0}
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    info["threads"] = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    info["rss_kb"] = int(line.split()[1])
+    except OSError:
+        pass
+    return info
+
+
+def _post(port: int, body: bytes, headers: Dict[str, str]) -> tuple:
+    t0 = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request(
+            "POST", "/feishu/callback", body, {"Content-Type": "application/json", **headers}
+        )
+        resp = conn.getresponse()
+        resp.read()
+        status = resp.status
+    except OSError:
+        status = 0
+    finally:
+        conn.close()
+    return status, time.perf_counter() - t0
+
+
+def run_rate(
+    port: int, pid: int, rate: float, duration: float, workers: int, encrypt_key: str = ""
+) -> dict:
+    n = int(rate * duration)
+    payloads = encode_payloads(make_payloads(n, seed=int(rate)), encrypt_key)
+    peak = {"threads": 0, "rss_kb": 0}
+    done = threading.Event()
+
+    def _sample() -> None:
+        while not done.is_set():
+            info = _proc_status(pid)
+            peak["threads"] = max(peak["threads"], info["threads"])
+            peak["rss_kb"] = max(peak["rss_kb"], info["rss_kb"])
+            time.sleep(0.1)
+
+    sampler = threading.Thread(target=_sample, daemon=True)
+    sampler.start()
+
+    # open-loop: request i is due at start + i / rate regardless of earlier acks
+    start = time.perf_counter()
+
+    def _send(i: int) -> Tuple[int, float]:
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return _post(port, *payloads[i])
+
+    # results are tallied here, on one thread, rather than by the workers
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_send, range(n)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+
+    statuses: Dict[int, int] = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    ms = [latency * 1000 for _, latency in results]
+    return {
+        "target_rps": rate,
+        "sent": n,
+        "acked_rps": round(n / elapsed, 1),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p90_ms": round(percentile(ms, 90), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2),
+        "statuses": statuses,
+        "peak_threads": peak["threads"],
+        "peak_rss_mb": round(peak["rss_kb"] / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rates", type=float, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--duration", type=float, default=10, help="seconds per rate")
+    parser.add_argument("--workers", type=int, default=64, help="client threads")
+    parser.add_argument("--encrypt-key", default="", help="send encrypted, signed callbacks")
+    args = parser.parse_args()
+
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_base = f"http://127.0.0.1:{stub.server_port}"
+
+    port = _free_port()
+    data_dir = tempfile.mkdtemp(prefix="openclaw-loadtest-")
+    env = dict(
+        os.environ,
+        OPENCLAW_BILI_API=stub_base,
+        OPENCLAW_FEISHU_API=stub_base,
+        OPENCLAW_DATA_DIR=data_dir,
+        FEISHU_APP_ID="cli_loadtest",
+        FEISHU_APP_SECRET="secret",
+        FEISHU_VERIFICATION_TOKEN=TOKEN,
+        FEISHU_ENCRYPT_KEY=args.encrypt_key,
+        FEISHU_BOT_NAME="",
+        OPENCLAW_SLEEP="0",
+        OPENCLAW_BACKOFF="0",
+        OPENCLAW_MAX_RATE="10000",
+        OPENCLAW_MAX_CONCURRENCY="64",
+        OPENCLAW_DEBUG="0",
+        PYTHONPATH=ROOT,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "openclaw.server", "--host", "127.0.0.1", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        idle = _proc_status(server.pid)
+        print(json.dumps({"idle_threads": idle["threads"], "idle_rss_mb": round(idle["rss_kb"] / 1024, 1)}))
+        for rate in args.rates:
+            print(json.dumps(run_rate(port, server.pid, rate, args.duration, args.workers, args.encrypt_key)))
+            # let handler threads drain before the next step
+            time.sleep(2)
+        print(json.dumps({"stub_calls": StubHandler.calls}))
+    finally:
+        server.terminate()
+        server.wait(timeout=5)
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
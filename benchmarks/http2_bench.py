@@ -0,0 +1,215 @@
+"""requests (HTTP/1.1) vs httpx HTTP/2 transport, against a local TLS server.
+
+Starts a TLS stand-in for api.bilibili.com in a separate process. It speaks
+h2 and http/1.1 via ALPN, answers every GET with an arc/search-sized JSON body
+after --latency seconds, and counts TCP connections. Then it drives
+`HttpClient.get_json` from 1, 8 and 32 threads with each transport.
+
+    python benchmarks/http2_bench.py --concurrency 1 8 32 --requests 400
+
+Needs `openssl` on PATH and httpx[http2] (pip install -e ".[http2]").
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openclaw.http import HttpClient  # noqa: E402
+from openclaw.ledger import percentile  # noqa: E402
+from openclaw.throttle import AimdPolicy, Limiter  # noqa: E402
+from openclaw.transport import TRANSPORTS, build_transport  # noqa: E402
+
+BODY = json.dumps(
+    {
+        "code": 0,
+        "data": {
+            "list": {
+                "vlist": [
+                    {"bvid": f"BV1stub{i:05d}", "title": "标题" * 12, "description": "简介" * 60}
+                    for i in range(30)
+                ]
+            }
+        },
+    },
+    ensure_ascii=False,
+).encode("utf-8")
+
+
+def make_cert(directory: str) -> tuple:
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return cert, key
+
+
+def serve(cert: str, key: str, latency: float, ready) -> None:
+    import h2.config
+    import h2.connection
+    import h2.events
+
+    stats = {"connections": 0, "h2": 0, "requests": 0}
+    ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ctx.load_cert_chain(cert, key)
+    ctx.set_alpn_protocols(["h2", "http/1.1"])
+
+    def body_for(path: str) -> bytes:
+        if path.startswith("/_stats"):
+            return json.dumps(stats).encode()
+        stats["requests"] += 1
+        return BODY
+
+    async def http1(reader, writer) -> None:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            path = head.split(b" ", 2)[1].decode()
+            await asyncio.sleep(latency)
+            body = body_for(path)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: %d\r\n\r\n" % len(body) + body
+            )
+            await writer.drain()
+
+    async def http2(reader, writer) -> None:
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        window = asyncio.Event()
+
+        async def respond(stream_id: int, path: str) -> None:
+            await asyncio.sleep(latency)
+            body = body_for(path)
+            conn.send_headers(
+                stream_id,
+                [(":status", "200"), ("content-type", "application/json"),
+                 ("content-length", str(len(body)))],
+            )
+            while body:
+                size = min(conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size)
+                if size <= 0:
+                    window.clear()
+                    await window.wait()
+                    continue
+                chunk, body = body[:size], body[size:]
+                conn.send_data(stream_id, chunk, end_stream=not body)
+                writer.write(conn.data_to_send())
+            await writer.drain()
+
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    path = dict(event.headers).get(b":path", b"/").decode()
+                    asyncio.ensure_future(respond(event.stream_id, path))
+                elif isinstance(event, h2.events.WindowUpdated):
+                    window.set()
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    writer.close()
+                    return
+            writer.write(conn.data_to_send())
+
+    async def handle(reader, writer) -> None:
+        stats["connections"] += 1
+        proto = writer.get_extra_info("ssl_object").selected_alpn_protocol()
+        try:
+            if proto == "h2":
+                stats["h2"] += 1
+                await http2(reader, writer)
+            else:
+                await http1(reader, writer)
+        except ConnectionError:
+            pass
+
+    async def main() -> None:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, ssl=ctx, backlog=512)
+        ready.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def run(kind: str, url: str, cafile: str, concurrency: int, requests: int) -> Dict:
+    transport = build_transport(kind=kind, verify=cafile)
+    limiter = Limiter(AimdPolicy(max_concurrency=concurrency, max_rate=1e6))
+    client = HttpClient(limiter=limiter, transport=transport)
+    stats_url = url.replace("/x/space/wbi/arc/search", "/_stats")
+    before = client.get_json(stats_url)
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def one(i: int) -> None:
+        t0 = time.perf_counter()
+        client.get_json(url, {"mid": i, "pn": 1, "ps": 30})
+        with lock:
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(one, range(requests)))
+    elapsed = time.perf_counter() - t0
+    after = client.get_json(stats_url)
+    transport.close()
+    return {
+        "transport": kind,
+        "concurrency": concurrency,
+        "req_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "connections": after["connections"] - before["connections"] + 1,
+        "h2_connections": after["h2"] - before["h2"] + (1 if kind == "http2" else 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=400, help="requests per case")
+    parser.add_argument("--latency", type=float, default=0.02, help="server think time (s)")
+    parser.add_argument("--transports", nargs="+", default=sorted(TRANSPORTS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_cert(tmp)
+        ready: multiprocessing.Queue = multiprocessing.Queue()
+        server = multiprocessing.Process(
+            target=serve, args=(cert, key, args.latency, ready), daemon=True
+        )
+        server.start()
+        url = f"https://localhost:{ready.get(timeout=10)}/x/space/wbi/arc/search"
+        try:
+            for c in args.concurrency:
+                for kind in args.transports:
+                    print(json.dumps(run(kind, url, cert, c, args.requests)))
+        finally:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Throughput vs. number of identities, entirely on localhost.
+
+Starts a stub Bilibili API that gives every SESSDATA its own risk-control
+budget (412 once a cookie exceeds --budget requests/s) and drives
+`HttpClient.get_json` through an `IdentityPool` of 1, 2, 4, ... identities.
+Prints successful requests/s, throttled responses and per-identity counts.
+
+    python benchmarks/identity_bench.py --identities 1 2 4 8 --duration 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openclaw.http import HttpClient  # noqa: E402
+from openclaw.identity import Identity, IdentityPool  # noqa: E402
+from openclaw.throttle import AimdPolicy, Limiter  # noqa: E402
+
+STUB_LATENCY = 0.01
+
+
+class RiskControlHandler(BaseHTTPRequestHandler):
+    # Sliding one-second window per SESSDATA; over budget -> HTTP 412.
+    protocol_version = "HTTP/1.1"
+    budget = 5
+    windows: Dict[str, List[float]] = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args) -> None:
+        return
+
+    def do_GET(self) -> None:
+        cookie = self.headers.get("Cookie", "")
+        who = next(
+            (p.split("=", 1)[1] for p in cookie.split("; ") if p.startswith("SESSDATA=")), "-"
+        )
+        now = time.monotonic()
+        with self.lock:
+            window = [t for t in self.windows.get(who, []) if now - t < 1.0]
+            window.append(now)
+            self.windows[who] = window
+            over = len(window) > self.budget
+        time.sleep(STUB_LATENCY)
+        body = json.dumps({"code": 0, "data": {"who": who}}).encode("utf-8")
+        self.send_response(412 if over else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run(url: str, n: int, rate: float, duration: float, workers: int) -> Dict:
+    identities = [Identity(f"id{i}", sessdata=f"sess{i}", max_rate=rate) for i in range(n)]
+    pool = IdentityPool(identities, bench=2.0, bench_max=10.0)
+    limiter = Limiter(AimdPolicy(max_concurrency=4 * n, max_rate=pool.total_rate))
+    client = HttpClient(limiter=limiter, pool=pool)
+    RiskControlHandler.windows = {}
+    ok = failed = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker() -> None:
+        nonlocal ok, failed
+        while time.monotonic() < deadline:
+            try:
+                client.get_json(url, {"mid": 1}, retry_on_statuses={412, 429})
+                with lock:
+                    ok += 1
+            except Exception:
+                with lock:
+                    failed += 1
+
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for _ in range(workers):
+            ex.submit(worker)
+    elapsed = time.monotonic() - t0
+    return {
+        "identities": n,
+        "ok_per_s": round(ok / elapsed, 1),
+        "failed": failed,
+        "throttled": sum(i.throttled for i in identities),
+        "per_identity": [i.requests for i in identities],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--identities", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--budget", type=int, default=5, help="stub: requests/s per SESSDATA")
+    parser.add_argument("--rate", type=float, default=4.5, help="per-identity max_rate")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    RiskControlHandler.budget = args.budget
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RiskControlHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/x/space/wbi/arc/search"
+    for n in args.identities:
+        print(json.dumps(run(url, n, args.rate, args.duration, args.workers)))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""JSON encode/decode cost on openclaw's hot paths.
+
+Compares what the code did before (stdlib, str round-trips, indented state)
+with the stdlib compact/bytes fallback and with `openclaw.jsonlib`'s active
+backend (orjson when installed). Payloads mimic Bilibili arc/search and
+search/type responses, a Feishu callback, and state/keyword-store files.
+
+    python benchmarks/json_bench.py --ups 500 --number 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openclaw import jsonlib  # noqa: E402
+
+rng = random.Random(7)
+WORDS = "教程 实况 测评 开箱 日常 游戏 音乐 翻唱 科技 数码 AI 绘画 编程 Python 入门 合集".split()
+
+
+def _title() -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+
+
+def _bvid() -> str:
+    return "BV1" + "".join(rng.choice("abcdefghijkmnopqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ123456789") for _ in range(9))
+
+
+def arc_search_response(n: int = 30) -> bytes:
+    vlist = []
+    for _ in range(n):
+        vlist.append(
+            {
+                "comment": rng.randint(0, 5000),
+                "typeid": rng.randint(1, 200),
+                "play": rng.randint(0, 2_000_000),
+                "pic": "http://i0.hdslb.com/bfs/archive/" + "%032x" % rng.getrandbits(128) + ".jpg",
+                "subtitle": "",
+                "description": _title() * 3,
+                "copyright": "1",
+                "title": _title(),
+                "review": 0,
+                "author": "某个UP主",
+                "mid": rng.randint(1, 10**9),
+                "created": 1_700_000_000 + rng.randint(0, 10**7),
+                "length": "%02d:%02d" % (rng.randint(0, 59), rng.randint(0, 59)),
+                "video_review": rng.randint(0, 9999),
+                "aid": rng.randint(1, 10**12),
+                "bvid": _bvid(),
+                "hide_click": False,
+                "is_pay": 0,
+                "is_union_video": 0,
+                "is_steins_gate": 0,
+                "is_live_playback": 0,
+                "meta": None,
+                "is_avoided": 0,
+                "attribute": 16777216,
+                "is_charging_arc": False,
+                "vt": 0,
+                "enable_vt": 0,
+                "vt_display": "",
+            }
+        )
+    data = {
+        "list": {"tlist": {str(i): {"tid": i, "count": rng.randint(1, 99), "name": "分区"} for i in range(1, 12)}, "vlist": vlist},
+        "page": {"pn": 1, "ps": n, "count": 812},
+        "episodic_button": {"text": "播放全部", "uri": "//www.bilibili.com/medialist/play/1?from=space"},
+        "is_risk": False,
+        "gaia_res_type": 0,
+        "gaia_data": None,
+    }
+    return json.dumps({"code": 0, "message": "0", "ttl": 1, "data": data}, ensure_ascii=False).encode()
+
+
+def search_type_response(n: int = 20) -> bytes:
+    result = []
+    for _ in range(n):
+        t = _title()
+        result.append(
+            {
+                "type": "video",
+                "id": rng.randint(1, 10**12),
+                "author": "某个UP主",
+                "mid": rng.randint(1, 10**9),
+                "typeid": "17",
+                "typename": "单机游戏",
+                "arcurl": "http://www.bilibili.com/video/av1",
+                "aid": rng.randint(1, 10**12),
+                "bvid": _bvid(),
+                "title": t.replace(WORDS[0], f'<em class="keyword">{WORDS[0]}</em>'),
+                "description": _title() * 4,
+                "arcrank": "0",
+                "pic": "//i1.hdslb.com/bfs/archive/x.jpg",
+                "play": rng.randint(0, 10**6),
+                "video_review": rng.randint(0, 999),
+                "favorites": rng.randint(0, 9999),
+                "tag": ",".join(rng.choice(WORDS) for _ in range(8)),
+                "review": rng.randint(0, 999),
+                "pubdate": 1_700_000_000 + rng.randint(0, 10**7),
+                "senddate": 1_700_000_000 + rng.randint(0, 10**7),
+                "duration": "12:34",
+                "badgepay": False,
+                "hit_columns": ["title", "tag"],
+                "view_type": "",
+                "is_pay": 0,
+                "is_union_video": 0,
+                "rec_tags": None,
+                "new_rec_tags": [],
+                "rank_score": rng.randint(0, 10**6),
+                "like": rng.randint(0, 99999),
+                "upic": "https://i0.hdslb.com/bfs/face/x.jpg",
+                "corner": "",
+                "cover": "",
+                "desc": "",
+                "url": "",
+                "rec_reason": "",
+                "danmaku": rng.randint(0, 9999),
+            }
+        )
+    data = {
+        "seid": str(rng.getrandbits(60)),
+        "page": 1,
+        "pagesize": n,
+        "numResults": 1000,
+        "numPages": 50,
+        "suggest_keyword": "",
+        "rqt_type": "search",
+        "cost_time": {k: "0.01" for k in ("total", "as_request", "params_check", "main_handler")},
+        "egg_hit": 0,
+        "result": result,
+        "show_column": 0,
+    }
+    return json.dumps({"code": 0, "message": "0", "ttl": 1, "data": data}, ensure_ascii=False).encode()
+
+
+def feishu_callback() -> bytes:
+    event = {
+        "schema": "2.0",
+        "header": {
+            "event_id": "%032x" % rng.getrandbits(128),
+            "token": "verification-token",
+            "create_time": "1700000000000",
+            "event_type": "im.message.receive_v1",
+            "tenant_key": "2ca1d211f64f6438",
+            "app_id": "cli_9e4f0d2c0f7a100d",
+        },
+        "event": {
+            "sender": {"sender_id": {"union_id": "on_x", "user_id": "e33ggbyz", "open_id": "ou_x"}, "sender_type": "user", "tenant_key": "x"},
+            "message": {
+                "message_id": "om_%032x" % rng.getrandbits(128),
+                "create_time": "1700000000000",
+                "chat_id": "oc_%032x" % rng.getrandbits(128),
+                "chat_type": "group",
+                "message_type": "text",
+                "content": json.dumps({"text": "@_user_1 查询 某个UP主 近3天"}, ensure_ascii=False),
+                "mentions": [{"key": "@_user_1", "id": {"open_id": "ou_y"}, "name": "丸子", "tenant_key": "x"}],
+            },
+        },
+    }
+    return json.dumps(event, ensure_ascii=False).encode()
+
+
+def state_file(ups: int) -> Dict[str, Any]:
+    state: Dict[str, Any] = {"ups": [], "keywords": WORDS[:8], "last_seen": {"up_videos": {}, "daily": {"date": "2024-05-01"}}}
+    for i in range(ups):
+        mid = str(rng.randint(1, 10**9))
+        state["ups"].append({"mid": mid, "name": f"UP主{i}", "added_at": "2024-05-01T08:00:00.000000Z"})
+        state["last_seen"]["up_videos"][mid] = [_bvid() for _ in range(20)]
+    return state
+
+
+def keyword_store(videos: int) -> Dict[str, Any]:
+    store: Dict[str, Any] = {"videos": {}, "followers": {}, "collected": {w: 1_700_000_000 for w in WORDS[:8]}}
+    for _ in range(videos):
+        bvid, mid = _bvid(), str(rng.randint(1, 10**9))
+        store["videos"][bvid] = {
+            "keywords": [rng.choice(WORDS)],
+            "first_seen": 1_700_000_000,
+            "bvid": bvid,
+            "mid": mid,
+            "pubdate": 1_700_000_000 + rng.randint(0, 10**6),
+            "play": rng.randint(0, 10**6),
+            "comment": rng.randint(0, 9999),
+            "title": _title(),
+            "author": "某个UP主",
+            "url": f"https://www.bilibili.com/video/{bvid}",
+            "fetched_at": 1_700_000_000,
+        }
+        store["followers"][mid] = {"follower": rng.randint(0, 99999), "fetched_at": 1_700_000_000}
+    return store
+
+
+def bench(fn: Callable[[], Any], number: int) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ups", type=int, default=500, help="UPs in the synthetic state file")
+    parser.add_argument("--store-videos", type=int, default=2000)
+    parser.add_argument("--number", type=int, default=200, help="iterations per case")
+    args = parser.parse_args()
+
+    stdlib_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    responses = {
+        "arc_search": arc_search_response(),
+        "search_type": search_type_response(),
+        "feishu_callback": feishu_callback(),
+    }
+    state = state_file(args.ups)
+    store = keyword_store(args.store_videos)
+    state_pretty = json.dumps(state, ensure_ascii=False, indent=2).encode()
+    state_compact = jsonlib.dumps(state)
+
+    cases: List[tuple] = []
+    for name, body in responses.items():
+        cases.append(
+            (
+                f"decode {name} ({len(body) // 1024} KB)",
+                # before: requests' resp.json() decodes to str, then json.loads
+                lambda b=body: json.loads(b.decode("utf-8")),
+                lambda b=body: json.loads(b),
+                lambda b=body: jsonlib.loads(b),
+            )
+        )
+    cases.append(
+        (
+            f"encode state ({args.ups} UPs)",
+            lambda: json.dumps(state, ensure_ascii=False, indent=2).encode("utf-8"),
+            lambda: stdlib_compact.encode(state).encode("utf-8"),
+            lambda: jsonlib.dumps(state),
+        )
+    )
+    cases.append(
+        (
+            f"decode state ({len(state_pretty) // 1024} KB -> {len(state_compact) // 1024} KB)",
+            lambda: json.loads(state_pretty.decode("utf-8")),
+            lambda: json.loads(state_compact),
+            lambda: jsonlib.loads(state_compact),
+        )
+    )
+    cases.append(
+        (
+            f"encode keyword store ({args.store_videos} videos)",
+            lambda: json.dumps(store, ensure_ascii=False).encode("utf-8"),
+            lambda: stdlib_compact.encode(store).encode("utf-8"),
+            lambda: jsonlib.dumps(store),
+        )
+    )
+
+    print(json.dumps({"backend": jsonlib.BACKEND, "unit": "us per call (best of 3)"}))
+    for name, before, fallback, current in cases:
+        b, f, c = bench(before, args.number), bench(fallback, args.number), bench(current, args.number)
+        print(
+            json.dumps(
+                {
+                    "case": name,
+                    "before": round(b, 1),
+                    "stdlib_fallback": round(f, 1),
+                    jsonlib.BACKEND: round(c, 1),
+                    "speedup": round(b / c, 2),
+                },
+                ensure_ascii=False,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Seen-video index: lookup cost and memory as the index grows.
+
+Marks N synthetic bvids as delivered to one chat (in batches, like up-watch/keyword-daily),
+then times `SeenIndex.unseen` on batches of never-pushed and already-pushed
+bvids. Reports the filter size, the observed false-positive rate and how many
+lookups had to go to sqlite.
+
+    python benchmarks/seen_bench.py --sizes 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openclaw.seen import SeenIndex  # noqa: E402
+
+
+def bvids(prefix: str, start: int, n: int) -> List[Dict[str, str]]:
+    return [{"bvid": f"BV{prefix}{i:010d}"} for i in range(start, start + n)]
+
+
+def time_lookups(index: SeenIndex, batches: List[List[Dict[str, str]]]) -> tuple:
+    confirmed = 0
+    real = index._confirmed
+
+    def counting(subscriber, keys):
+        nonlocal confirmed
+        confirmed += len(keys)
+        return real(subscriber, keys)
+
+    index._confirmed = counting
+    t0 = time.perf_counter()
+    kept = sum(len(index.unseen(batch)) for batch in batches)
+    elapsed = time.perf_counter() - t0
+    index._confirmed = real
+    lookups = sum(len(b) for b in batches)
+    return elapsed / lookups * 1e6, kept, confirmed
+
+
+def run(n: int, error: float, probes: int, batch: int) -> Dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SeenIndex(os.path.join(tmp, "seen"), capacity=n, error=error)
+        rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        t0 = time.perf_counter()
+        for start in range(0, n, batch):
+            index.mark(bvids("1", start, min(batch, n - start)), "bench")
+        mark_s = time.perf_counter() - t0
+        rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        fresh = [bvids("9", i, batch) for i in range(0, probes, batch)]
+        seen = [bvids("1", (i * 7919) % max(1, n - batch), batch) for i in range(0, probes, batch)]
+        fresh_us, kept, fresh_sql = time_lookups(index, fresh)
+        seen_us, _, seen_sql = time_lookups(index, seen)
+        stats = index.stats()
+        return {
+            "videos": n,
+            "bloom_bytes": stats["bloom_bytes"],
+            "db_bytes": os.path.getsize(os.path.join(tmp, "seen", "seen.db")),
+            "mark_us": round(mark_s / n * 1e6, 2),
+            "unseen_us_new": round(fresh_us, 2),
+            "unseen_us_pushed": round(seen_us, 2),
+            "false_positive_rate": round(fresh_sql / probes, 5),
+            "expected_fpr": stats["false_positive_rate"],
+            "new_dropped": probes - kept,
+            "sqlite_lookups_new": fresh_sql,
+            "sqlite_lookups_pushed": seen_sql,
+            "maxrss_growth_kb": rss1 - rss0,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--error", type=float, default=0.001)
+    parser.add_argument("--probes", type=int, default=50_000, help="lookups per case")
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+    for n in args.sizes:
+        print(json.dumps(run(n, args.error, args.probes, args.batch)))
+
+
+if __name__ == "__main__":
+    main()
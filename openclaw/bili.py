@@ -1,21 +1,81 @@
 from __future__ import annotations
 
 import datetime as dt
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, Iterable, List, TypeVar
 
+from .config import BILI_API_BASE
 from .http import HttpClient
+from .identity import get_identity_pool
+from .models import UpProfile, Video
+from .singleflight import SingleFlight
+from .throttle import PRIORITY_INTERACTIVE, get_limiter
+from .utils import parse_count
+from .wbi import SIGN_ERROR_CODES, get_wbi_keys, sign_params
+
+T = TypeVar("T")
+
+# shared by all clients so concurrent chat handlers coalesce identical calls
+_flight = SingleFlight()
+
+# retrying won't help: account gone/banned (-404, -626), space hidden (53013)
+PERMANENT_CODES = {-404, -626, 53013}
+# risk control pushing back on this client, not a problem with what it asked for
+THROTTLE_CODES = {-352, -412, -799}
+
+
+class BiliApiError(RuntimeError):
+    def __init__(self, data: Dict[str, Any]) -> None:
+        super().__init__(f"Bili API error: {data}")
+        self.code = data.get("code")
+        self.reason = data.get("message") or ""
+
+    @property
+    def permanent(self) -> bool:
+        return self.code in PERMANENT_CODES
+
+    @property
+    def throttled(self) -> bool:
+        return self.code in THROTTLE_CODES
+
+    @property
+    def up_specific(self) -> bool:
+        # about the requested UP, so it counts toward that UP's health
+        return not self.throttled and self.code not in SIGN_ERROR_CODES
 
 
 class BiliClient:
-    def __init__(self) -> None:
-        self.http = HttpClient()
+    def __init__(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        self.http = HttpClient(
+            limiter=get_limiter(), priority=priority, pool=get_identity_pool()
+        )
 
     def _check(self, data: Dict[str, Any]) -> Dict[str, Any]:
         if data.get("code") != 0:
-            raise RuntimeError(f"Bili API error: {data}")
+            raise BiliApiError(data)
         return data
 
-    def _get(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _get(self, url: str, params: Dict[str, Any], signed: bool = False) -> Dict[str, Any]:
+        # callers only read the response, so waiters can share the leader's dict.
+        # Only same-priority callers share: a chat query must not wait behind a
+        # batch request still queued in the limiter.
+        params_key = tuple(sorted((k, str(v)) for k, v in params.items()))
+        key = (self.http.priority, url, params_key)
+        return _flight.do(key, lambda: self._get_once(url, params, signed))
+
+    def _get_once(self, url: str, params: Dict[str, Any], signed: bool) -> Dict[str, Any]:
+        if not signed:
+            return self._fetch(url, params)
+        keys = get_wbi_keys()
+        key = keys.get(self.http)
+        data = self._fetch(url, sign_params(params, key))
+        if data.get("code") in SIGN_ERROR_CODES:
+            # keys rotated under us: refresh once and re-sign
+            key = keys.refresh(self.http, key)
+            data = self._fetch(url, sign_params(params, key))
+        return data
+
+    def _fetch(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
         return self.http.get_json(
             url,
             params,
@@ -23,84 +83,77 @@ class BiliClient:
             retry_on_codes={-799},
         )
 
-    def search_user(self, keyword: str, page: int = 1, page_size: int = 10) -> List[Dict[str, Any]]:
-        url = "https://api.bilibili.com/x/web-interface/search/type"
+    def search_user(self, keyword: str, page: int = 1, page_size: int = 10) -> List[UpProfile]:
+        url = f"{BILI_API_BASE}/x/web-interface/wbi/search/type"
         params = {
             "search_type": "bili_user",
             "keyword": keyword,
             "page": page,
             "page_size": page_size,
         }
-        data = self._check(self._get(url, params))
+        data = self._check(self._get(url, params, signed=True))
         result = data.get("data", {}).get("result", []) or []
         users = []
         for item in result:
             users.append(
-                {
-                    "mid": item.get("mid"),
-                    "uname": item.get("uname"),
-                    "fans": item.get("fans"),
-                }
+                UpProfile(mid=item.get("mid"), name=item.get("uname"), follower=item.get("fans"))
             )
         return users
 
-    def get_up_info(self, mid: str) -> Dict[str, Any]:
-        url = "https://api.bilibili.com/x/space/acc/info"
-        data = self._check(self._get(url, {"mid": mid}))
+    def get_up_info(self, mid: str) -> UpProfile:
+        url = f"{BILI_API_BASE}/x/space/wbi/acc/info"
+        data = self._check(self._get(url, {"mid": mid}, signed=True))
         d = data.get("data", {}) or {}
-        info = {
-            "mid": str(d.get("mid")),
-            "name": d.get("name"),
-            "sign": d.get("sign"),
-            "level": d.get("level"),
-            "face": d.get("face"),
-        }
+        info = UpProfile(
+            mid=d.get("mid"),
+            name=d.get("name"),
+            sign=d.get("sign"),
+            level=d.get("level"),
+            face=d.get("face"),
+        )
         try:
             stat = self.get_relation_stat(mid)
-            info["follower"] = stat.get("follower", 0)
+            info.follower = parse_count(stat.get("follower", 0))
         except Exception:
-            info["follower"] = d.get("follower", 0)
+            info.follower = parse_count(d.get("follower", 0))
         return info
 
     def get_relation_stat(self, mid: str) -> Dict[str, Any]:
-        url = "https://api.bilibili.com/x/relation/stat"
+        url = f"{BILI_API_BASE}/x/relation/stat"
         data = self._check(self._get(url, {"vmid": mid}))
-        return data.get("data", {}) or {}
+        return dict(data.get("data", {}) or {})
 
-    def list_up_videos(self, mid: str, page: int = 1, page_size: int = 30) -> List[Dict[str, Any]]:
-        url = "https://api.bilibili.com/x/space/arc/search"
+    def list_up_videos(self, mid: str, page: int = 1, page_size: int = 30) -> List[Video]:
+        url = f"{BILI_API_BASE}/x/space/wbi/arc/search"
         params = {
             "mid": mid,
             "pn": page,
             "ps": page_size,
             "order": "pubdate",
         }
-        data = self._check(self._get(url, params))
+        data = self._check(self._get(url, params, signed=True))
         vlist = data.get("data", {}).get("list", {}).get("vlist", []) or []
-        videos: List[Dict[str, Any]] = []
+        videos: List[Video] = []
         for v in vlist:
             videos.append(
-                {
-                    "bvid": v.get("bvid"),
-                    "aid": v.get("aid"),
-                    "title": v.get("title"),
-                    "description": v.get("description"),
-                    "pic": v.get("pic"),
-                    "pubdate": v.get("created"),
-                    "length": v.get("length"),
-                    "play": v.get("play"),
-                    "comment": v.get("comment"),
-                    "mid": str(v.get("mid")),
-                    "author": v.get("author"),
-                    "url": f"https://www.bilibili.com/video/{v.get('bvid')}"
-                    if v.get("bvid")
-                    else None,
-                }
+                Video(
+                    bvid=v.get("bvid"),
+                    aid=v.get("aid"),
+                    title=v.get("title"),
+                    description=v.get("description"),
+                    pic=v.get("pic"),
+                    pubdate=v.get("created"),
+                    length=v.get("length"),
+                    play=v.get("play"),
+                    comment=v.get("comment"),
+                    mid=v.get("mid"),
+                    author=v.get("author"),
+                )
             )
         return videos
 
     def get_video_detail(self, bvid: str) -> Dict[str, Any]:
-        url = "https://api.bilibili.com/x/web-interface/view"
+        url = f"{BILI_API_BASE}/x/web-interface/view"
         data = self._check(self._get(url, {"bvid": bvid}))
         d = data.get("data", {}) or {}
         return {
@@ -118,33 +171,44 @@ class BiliClient:
         }
 
     def search_videos_by_keyword(
-        self, keyword: str, page: int = 1, page_size: int = 20
-    ) -> List[Dict[str, Any]]:
-        url = "https://api.bilibili.com/x/web-interface/search/type"
-        params = {
+        self,
+        keyword: str,
+        page: int = 1,
+        page_size: int = 20,
+        order: str | None = None,
+        pubtime_begin: int | None = None,
+        pubtime_end: int | None = None,
+    ) -> List[Video]:
+        url = f"{BILI_API_BASE}/x/web-interface/wbi/search/type"
+        params: Dict[str, Any] = {
             "search_type": "video",
             "keyword": keyword,
             "page": page,
             "page_size": page_size,
         }
-        data = self._check(self._get(url, params))
+        # order: totalrank (default), click, pubdate, dm, stow
+        if order:
+            params["order"] = order
+        if pubtime_begin:
+            params["pubtime_begin_s"] = int(pubtime_begin)
+        if pubtime_end:
+            params["pubtime_end_s"] = int(pubtime_end)
+        data = self._check(self._get(url, params, signed=True))
         result = data.get("data", {}).get("result", []) or []
-        videos: List[Dict[str, Any]] = []
+        videos: List[Video] = []
         for item in result:
-            bvid = item.get("bvid")
             videos.append(
-                {
-                    "bvid": bvid,
-                    "title": item.get("title"),
-                    "description": item.get("description"),
-                    "pic": item.get("pic"),
-                    "pubdate": item.get("pubdate"),
-                    "author": item.get("author"),
-                    "mid": str(item.get("mid")),
-                    "play": item.get("play"),
-                    "comment": item.get("comment"),
-                    "url": f"https://www.bilibili.com/video/{bvid}" if bvid else None,
-                }
+                Video(
+                    bvid=item.get("bvid"),
+                    title=item.get("title"),
+                    description=item.get("description"),
+                    pic=item.get("pic"),
+                    pubdate=item.get("pubdate"),
+                    author=item.get("author"),
+                    mid=item.get("mid"),
+                    play=item.get("play"),
+                    comment=item.get("comment"),
+                )
             )
         return videos
 
@@ -155,3 +219,13 @@ def within_days(pub_ts: int | None, days: int) -> bool:
     pub = dt.datetime.utcfromtimestamp(pub_ts)
     now = dt.datetime.utcnow()
     return (now - pub).days <= days
+
+
+def window_start(days: int, now: float | None = None) -> int:
+    # same window as within_days: published less than days + 1 whole days ago
+    return int(now or time.time()) - (days + 1) * 86400
+
+
+def filter_window(videos: Iterable[T], days: int, now: float | None = None) -> List[T]:
+    cutoff = window_start(days, now)
+    return [v for v in videos if (v.get("pubdate") or 0) > cutoff]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from .config import CHECKPOINT_EVERY, CHECKPOINT_MAX_AGE
+from .jsonlib import dump_file, load_file
+from .storage import DATA_DIR
+
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")
+
+
+class Checkpoint:
+    # Progress of one task run in data/checkpoints/<task>.json. A rerun with
+    # the same key (e.g. today's date) picks `data` up again; clear() removes
+    # it once the run completes. save() writes at most once per `every`
+    # seconds unless forced, always as an atomic replace.
+
+    def __init__(
+        self,
+        task: str,
+        key: str = "",
+        resume: bool = True,
+        max_age: float = CHECKPOINT_MAX_AGE * 3600,
+        every: float = CHECKPOINT_EVERY,
+    ) -> None:
+        self.task = task
+        self.key = key
+        self.every = every
+        self.path = os.path.join(CHECKPOINT_DIR, f"{task}.json")
+        self.data: Dict[str, Any] = self._load(max_age) if resume else {}
+        self.resumed = bool(self.data)
+        self._saved_at = 0.0
+        self._lock = threading.Lock()
+        if not resume:
+            self.clear()
+
+    def _load(self, max_age: float) -> Dict[str, Any]:
+        try:
+            saved = load_file(self.path)
+        except (OSError, ValueError):
+            return {}
+        if saved.get("key") != self.key or time.time() - saved.get("updated_at", 0) > max_age:
+            return {}
+        return saved.get("data") or {}
+
+    def save(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.time()
+            if not force and now - self._saved_at < self.every:
+                return
+            self._saved_at = now
+            os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            dump_file(tmp, {"task": self.task, "key": self.key, "updated_at": now, "data": self.data})
+            os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
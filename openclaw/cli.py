@@ -1,25 +1,47 @@
 from __future__ import annotations
 
 import argparse
-import json
+import datetime as dt
+import os
+import socket
 import sys
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
 
 from .bili import BiliClient
+from .export import DATASETS, WRITERS, default_output, export, parse_since
+from .jsonlib import dumps_str
+from .ledger import load_runs, summarize
+from .models import UpProfile
+from .search_index import get_search_index
+from .seen import get_seen_index
+from .simulate import DEFAULT_POLICIES, Policy, load_trace, run_simulation, synthetic_trace
 from .storage import (
+    DEFAULT_SUBSCRIBER,
     add_keyword,
-    add_up,
+    get_subscribers,
+    get_up_health,
     load_state,
     remove_keyword,
     remove_up,
     save_state,
+    set_up_health,
+    subscribe,
+    unsubscribe,
+    update_state,
+)
+from .tasks import (
+    run_all,
+    run_keyword_collect,
+    run_keyword_daily,
+    run_up_watch,
+    run_up_watch_sharded,
 )
-from .tasks import run_all, run_keyword_daily, run_up_watch
 
 
 def _print(obj) -> None:
     if isinstance(obj, (dict, list)):
-        print(json.dumps(obj, ensure_ascii=False, indent=2))
+        print(dumps_str(obj, pretty=True))
     else:
         print(obj)
 
@@ -29,7 +51,7 @@ def cmd_up_add(args: argparse.Namespace) -> None:
     client = BiliClient()
     identifier = args.identifier
 
-    up: Dict[str, str] | None = None
+    up: UpProfile | None = None
 
     if identifier.isdigit():
         up = client.get_up_info(identifier)
@@ -53,23 +75,50 @@ def cmd_up_add(args: argparse.Namespace) -> None:
         print("UP not found. Provide MID or space URL.")
         sys.exit(1)
 
-    add_up(state, {"mid": up.get("mid"), "name": up.get("name")})
+    subscribe(state, {"mid": up.get("mid"), "name": up.get("name")}, args.subscriber)
     save_state(state)
-    _print({"added": up})
+    _print({"added": up.to_dict(), "subscriber": args.subscriber})
 
 
 def cmd_up_list(_: argparse.Namespace) -> None:
     state = load_state()
-    _print(state.get("ups", []))
+    ups = state.get("ups", [])
+    _print([{**u, "subscribers": get_subscribers(state, u.get("mid"))} for u in ups])
 
 
 def cmd_up_remove(args: argparse.Namespace) -> None:
     state = load_state()
-    ok = remove_up(state, args.mid)
+    if args.subscriber:
+        ok = unsubscribe(state, args.mid, args.subscriber)
+    else:
+        ok = remove_up(state, args.mid)
     save_state(state)
     _print({"removed": ok})
 
 
+def cmd_up_health(args: argparse.Namespace) -> None:
+    if args.reset or args.reset_all:
+        cleared: List[str] = []
+
+        def _reset(state: Dict) -> None:
+            health = get_up_health(state)
+            cleared.extend(health if args.reset_all else [m for m in args.reset if m in health])
+            for mid in cleared:
+                set_up_health(state, mid, None)
+
+        update_state(_reset)
+        _print({"reset": cleared})
+        return
+    state = load_state()
+    names = {str(u.get("mid")): u.get("name") for u in state.get("ups", [])}
+    rows = []
+    for mid, entry in get_up_health(state).items():
+        row = {"mid": mid, "name": names.get(mid), **entry}
+        row["next_retry_at"] = dt.datetime.fromtimestamp(entry.get("next_retry", 0)).isoformat()
+        rows.append(row)
+    _print(sorted(rows, key=lambda r: r.get("next_retry", 0)))
+
+
 def cmd_kw_add(args: argparse.Namespace) -> None:
     state = load_state()
     add_keyword(state, args.keyword)
@@ -89,20 +138,97 @@ def cmd_kw_remove(args: argparse.Namespace) -> None:
     _print({"removed": ok})
 
 
+def _worker_id(index: int | None = None) -> str:
+    wid = f"{socket.gethostname()}-{os.getpid()}"
+    return wid if index is None else f"{wid}-{index}"
+
+
+def _sharded_worker(index: int) -> Tuple[int, List[str]]:
+    return run_up_watch_sharded(_worker_id(index), notify=True)
+
+
 def cmd_run(args: argparse.Namespace) -> None:
-    if args.task == "up-watch":
-        count, errors = run_up_watch(notify=True)
+    if args.task == "up-watch" and args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(_sharded_worker, range(args.workers)))
+        _print(
+            {
+                "new": sum(c for c, _ in results),
+                "errors": [e for _, errs in results for e in errs],
+            }
+        )
+    elif args.task == "up-watch" and (args.sharded or args.worker_id):
+        count, errors = run_up_watch_sharded(args.worker_id or _worker_id(), notify=True)
+        _print({"new": count, "errors": errors})
+    elif args.task == "up-watch":
+        count, errors = run_up_watch(notify=True, resume=not args.restart)
         _print({"new": count, "errors": errors})
     elif args.task == "keyword-daily":
-        count, errors = run_keyword_daily(force=args.force, notify=True)
+        count, errors = run_keyword_daily(
+            force=args.force, notify=True, resume=not args.restart
+        )
         _print({"items": count, "errors": errors})
+    elif args.task == "keyword-collect":
+        count, errors = run_keyword_collect(resume=not args.restart)
+        _print({"collected": count, "errors": errors})
     elif args.task == "all":
-        counts, errors = run_all()
+        counts, errors = run_all(resume=not args.restart)
         _print({"counts": counts, "errors": errors})
     else:
         raise RuntimeError("Unknown task")
 
 
+def cmd_stats(args: argparse.Namespace) -> None:
+    runs = load_runs(last=args.last, task=args.task)
+    if args.raw:
+        _print(runs)
+        return
+    _print(summarize(runs))
+
+
+def cmd_search(args: argparse.Namespace) -> None:
+    _print(get_search_index().search(args.query, days=args.days, limit=args.limit))
+
+
+def cmd_seen(args: argparse.Namespace) -> None:
+    index = get_seen_index()
+    if args.rebuild:
+        index.rebuild()
+    if args.bvids:
+        _print({bvid: index.get(bvid) for bvid in args.bvids})
+    else:
+        _print(index.stats())
+
+
+def cmd_simulate(args: argparse.Namespace) -> None:
+    if args.trace:
+        mids = [str(u.get("mid")) for u in load_state().get("ups", [])] if args.watched else None
+        trace, days = load_trace(args.trace, mids)
+    else:
+        trace = synthetic_trace(args.ups, args.days, args.uploads_per_week, args.seed)
+        days = args.days
+    policies = [Policy.parse(spec) for spec in args.policy or DEFAULT_POLICIES]
+    results = run_simulation(
+        policies,
+        trace,
+        days,
+        server_rate=args.server_rate,
+        server_burst=args.server_burst,
+        penalty=args.penalty,
+        latency=args.latency,
+    )
+    _print(results)
+
+
+def cmd_export(args: argparse.Namespace) -> None:
+    since = parse_since(args.since) if args.since else None
+    compress = not args.no_compress
+    output = args.output or default_output(args.dataset, args.format, compress)
+    n = export(args.dataset, args.format, output, since=since, by=args.by, compress=compress)
+    if output != "-":
+        _print({"rows": n, "output": output})
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="openclaw")
     sub = parser.add_subparsers(dest="cmd", required=True)
@@ -111,12 +237,24 @@ def build_parser() -> argparse.ArgumentParser:
     up_sub = up.add_subparsers(dest="action", required=True)
     up_add = up_sub.add_parser("add", help="Add UP by MID/name/url")
     up_add.add_argument("identifier")
+    up_add.add_argument(
+        "--subscriber",
+        default=DEFAULT_SUBSCRIBER,
+        help="who gets notified: default, feishu:<chat_id> or telegram:<chat_id>",
+    )
     up_add.set_defaults(func=cmd_up_add)
     up_list = up_sub.add_parser("list", help="List UPs")
     up_list.set_defaults(func=cmd_up_list)
     up_rm = up_sub.add_parser("remove", help="Remove UP by MID")
     up_rm.add_argument("mid")
+    up_rm.add_argument(
+        "--subscriber", help="only unsubscribe this subscriber (default: stop watching the UP)"
+    )
     up_rm.set_defaults(func=cmd_up_remove)
+    up_health = up_sub.add_parser("health", help="Show failing/quarantined UPs")
+    up_health.add_argument("--reset", nargs="+", metavar="MID", help="check these UPs next run")
+    up_health.add_argument("--reset-all", action="store_true", help="clear all failure state")
+    up_health.set_defaults(func=cmd_up_health)
 
     kw = sub.add_parser("kw", help="Manage keyword list")
     kw_sub = kw.add_subparsers(dest="action", required=True)
@@ -130,10 +268,81 @@ def build_parser() -> argparse.ArgumentParser:
     kw_rm.set_defaults(func=cmd_kw_remove)
 
     run = sub.add_parser("run", help="Run tasks")
-    run.add_argument("task", choices=["up-watch", "keyword-daily", "all"])
+    run.add_argument("task", choices=["up-watch", "keyword-daily", "keyword-collect", "all"])
     run.add_argument("--force", action="store_true", help="force daily report")
+    run.add_argument(
+        "--sharded", action="store_true", help="up-watch: claim UP shards with other workers"
+    )
+    run.add_argument("--worker-id", help="up-watch: sharded worker id (default host-pid)")
+    run.add_argument(
+        "--workers", type=int, default=1, help="up-watch: run N local sharded workers"
+    )
+    resume = run.add_mutually_exclusive_group()
+    resume.add_argument(
+        "--resume",
+        dest="restart",
+        action="store_false",
+        help="continue an interrupted run from its checkpoint (default)",
+    )
+    resume.add_argument(
+        "--restart", action="store_true", help="discard the checkpoint and start over"
+    )
     run.set_defaults(func=cmd_run)
 
+    stats = sub.add_parser("stats", help="Run history percentiles and trends")
+    stats.add_argument("--last", type=int, default=50, help="last N runs (0 = all)")
+    stats.add_argument("--task", help="only this task, e.g. up-watch")
+    stats.add_argument("--raw", action="store_true", help="print the run records")
+    stats.set_defaults(func=cmd_stats)
+
+    search = sub.add_parser("search", help="Search videos seen by past runs (no API calls)")
+    search.add_argument("query")
+    search.add_argument("--days", type=int, help="only videos published in the last N days")
+    search.add_argument("--limit", type=int, default=10)
+    search.set_defaults(func=cmd_search)
+
+    seen = sub.add_parser("seen", help="Videos already delivered (repeat suppression)")
+    seen.add_argument("bvids", nargs="*", help="chats each was delivered to (default: index stats)")
+    seen.add_argument("--rebuild", action="store_true", help="rebuild the Bloom prefilter")
+    seen.set_defaults(func=cmd_seen)
+
+    sim = sub.add_parser(
+        "simulate", help="Replay up-watch policies on a virtual clock (no network)"
+    )
+    sim.add_argument(
+        "--policy",
+        action="append",
+        help="INTERVAL[:MAX_RATE], e.g. 15m:2 (repeatable; default "
+        + " ".join(DEFAULT_POLICIES)
+        + ")",
+    )
+    sim.add_argument("--trace", help="JSON lines with mid and pubdate, e.g. data/search/docs.jsonl")
+    sim.add_argument("--watched", action="store_true", help="trace: only the UPs in state.json")
+    sim.add_argument("--ups", type=int, default=200, help="synthetic: number of UPs")
+    sim.add_argument("--days", type=float, default=365, help="synthetic: days to simulate")
+    sim.add_argument(
+        "--uploads-per-week", type=float, default=3.0, help="synthetic: mean uploads per UP"
+    )
+    sim.add_argument("--seed", type=int, default=0)
+    sim.add_argument("--server-rate", type=float, default=2.0, help="risk control: requests/s")
+    sim.add_argument("--server-burst", type=float, default=60, help="risk control: bucket size")
+    sim.add_argument(
+        "--penalty", type=float, default=600, help="risk control: seconds blocked once tripped"
+    )
+    sim.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    sim.set_defaults(func=cmd_simulate)
+
+    exp = sub.add_parser("export", help="Stream collected data to a file")
+    exp.add_argument("dataset", choices=sorted(DATASETS))
+    exp.add_argument("--format", choices=sorted(WRITERS), default="csv")
+    exp.add_argument("-o", "--output", help="output path, '-' for stdout (default: timestamped)")
+    exp.add_argument("--since", help="only rows at/after: 7d, 12h, 2024-05-01, or a unix ts")
+    exp.add_argument(
+        "--by", help="field --since applies to (default: fetched_at/added_at/started_at)"
+    )
+    exp.add_argument("--no-compress", action="store_true", help="plain csv/jsonl instead of .gz")
+    exp.set_defaults(func=cmd_export)
+
     return parser
 
 
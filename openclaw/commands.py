@@ -3,8 +3,16 @@ from __future__ import annotations
 import datetime as dt
 import re
 
-from .bili import BiliClient, within_days
-from .storage import add_up, load_state, remove_up, save_state
+from .bili import BiliClient, filter_window
+from .models import UpProfile
+from .search_index import get_search_index
+from .storage import (
+    DEFAULT_SUBSCRIBER,
+    get_state_store,
+    get_subscribed_ups,
+    subscribe,
+    unsubscribe,
+)
 
 
 def _fmt_ts(ts: int | None) -> str:
@@ -47,7 +55,7 @@ def _clean_identifier(text: str, days: int, bot_name: str | None) -> str:
     return t.strip()
 
 
-def _resolve_up(identifier: str) -> dict | None:
+def _resolve_up(identifier: str) -> UpProfile | None:
     client = BiliClient()
     if identifier.isdigit():
         return client.get_up_info(identifier)
@@ -72,7 +80,7 @@ def _handle_query(client: BiliClient, identifier: str, days: int) -> str:
         return "没找到该UP，请提供MID或空间链接。"
     mid = str(up.get("mid"))
     videos = client.list_up_videos(mid, page=1, page_size=30)
-    items = [v for v in videos if within_days(v.get("pubdate"), days)]
+    items = filter_window(videos, days)
     if not items:
         return f"{up.get('name')} 近{days}天没有发布新视频。"
     lines = [f"{up.get('name')} 近{days}天发布："]
@@ -83,17 +91,37 @@ def _handle_query(client: BiliClient, identifier: str, days: int) -> str:
     return "\n".join(lines)
 
 
-def _handle_follow(identifier: str) -> str:
+def _handle_search(text: str) -> str:
+    # answered from the local index only; "近N天" is optional here
+    m = re.search(r"(近|最近|进)\s*(\d+)\s*天", text)
+    days = max(1, int(m.group(2))) if m else None
+    query = re.sub(r"(近|最近|进)\s*\d+\s*天.*", "", text).strip()
+    if not query:
+        return "请提供搜索词，例如：搜索 AI绘画 近7天"
+    results = get_search_index().search(query, days=days, limit=10)
+    span = f"近{days}天" if days else "已收录"
+    if not results:
+        return f"{span}的视频里没有找到「{query}」。"
+    lines = [f"「{query}」{span}的视频："]
+    for v in results:
+        lines.append(
+            f"- {v.get('title')} | {v.get('author') or '-'} | { _fmt_ts(v.get('pubdate')) }\n  {v.get('url')}"
+        )
+    return "\n".join(lines)
+
+
+def _handle_follow(identifier: str, subscriber: str) -> str:
     up = _resolve_up(identifier)
     if not up:
         return "没找到该UP，请提供MID或空间链接。"
-    state = load_state()
-    add_up(state, {"mid": up.get("mid"), "name": up.get("name")})
-    save_state(state)
+    entry = {"mid": up.get("mid"), "name": up.get("name")}
+    added = get_state_store().update(lambda state: subscribe(state, dict(entry), subscriber))
+    if not added:
+        return f"已经关注过：{up.get('name')} (MID: {up.get('mid')})"
     return f"已关注：{up.get('name')} (MID: {up.get('mid')})"
 
 
-def _handle_unfollow(identifier: str) -> str:
+def _handle_unfollow(identifier: str, subscriber: str) -> str:
     up = _resolve_up(identifier)
     if not up and identifier.isdigit():
         mid = identifier
@@ -101,15 +129,12 @@ def _handle_unfollow(identifier: str) -> str:
         mid = str(up.get("mid"))
     else:
         return "没找到该UP，请提供MID或空间链接。"
-    state = load_state()
-    ok = remove_up(state, mid)
-    save_state(state)
+    ok = get_state_store().update(lambda state: unsubscribe(state, mid, subscriber))
     return "已取消关注" if ok else "未找到该关注"
 
 
-def _handle_list() -> str:
-    state = load_state()
-    ups = state.get("ups", [])
+def _handle_list(subscriber: str) -> str:
+    ups = get_state_store().read(lambda state: get_subscribed_ups(state, subscriber))
     if not ups:
         return "当前没有关注任何UP。"
     lines = ["当前关注UP列表:"]
@@ -118,7 +143,15 @@ def _handle_list() -> str:
     return "\n".join(lines)
 
 
-def parse_command(text: str, bot_name: str | None = None) -> str | None:
+def parse_command(
+    text: str,
+    bot_name: str | None = None,
+    chat_id: str | None = None,
+    channel: str | None = None,
+) -> str | None:
+    # follow/unfollow/list are scoped to the chat that sent the command;
+    # without a chat they act on the default subscriber (the CLI's list)
+    subscriber = f"{channel}:{chat_id}" if channel and chat_id else DEFAULT_SUBSCRIBER
     t = text.strip()
     if not t:
         return "请发送指令，例如：查询 xxx 近3天"
@@ -128,16 +161,19 @@ def parse_command(text: str, bot_name: str | None = None) -> str | None:
             return None
         t = _strip_bot_name(t, bot_name).strip()
 
+    if t.startswith("搜索"):
+        return _handle_search(t[len("搜索") :].strip())
+
     if "取消关注" in t:
         ident = t.split("取消关注", 1)[1].strip()
-        return _handle_unfollow(ident)
+        return _handle_unfollow(ident, subscriber)
 
     if "列出关注" in t or "关注列表" in t or "我的关注" in t:
-        return _handle_list()
+        return _handle_list(subscriber)
 
     if "关注" in t:
         ident = t.split("关注", 1)[1].strip()
-        return _handle_follow(ident)
+        return _handle_follow(ident, subscriber)
 
     # query
     days = _parse_days(t)
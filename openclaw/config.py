@@ -39,20 +39,89 @@ NOTIFY_CHANNEL = os.getenv("OPENCLAW_NOTIFY", "").strip().lower()
 BILI_SESSDATA = os.getenv("BILI_SESSDATA", "").strip()
 BILI_COOKIE = os.getenv("BILI_COOKIE", "").strip()
 
+# API origins and data dir can be pointed elsewhere (local stubs, load tests).
+BILI_API_BASE = os.getenv("OPENCLAW_BILI_API", "https://api.bilibili.com").rstrip("/")
+FEISHU_API_BASE = os.getenv("OPENCLAW_FEISHU_API", "https://open.feishu.cn").rstrip("/")
+DATA_DIR = os.getenv("OPENCLAW_DATA_DIR", "").strip() or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data"
+)
+
 USER_AGENT = os.getenv(
     "OPENCLAW_UA",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
 )
 
+# "requests" (HTTP/1.1) or "http2" (httpx, multiplexed; pip install "openclaw[http2]")
+HTTP_TRANSPORT = os.getenv("OPENCLAW_TRANSPORT", "requests").strip().lower()
 REQUEST_TIMEOUT = float(os.getenv("OPENCLAW_TIMEOUT", "10"))
 REQUEST_SLEEP = float(os.getenv("OPENCLAW_SLEEP", "0.2"))
 REQUEST_RETRIES = int(os.getenv("OPENCLAW_RETRIES", "3"))
 REQUEST_BACKOFF = float(os.getenv("OPENCLAW_BACKOFF", "0.6"))
 
+# Adaptive limits for Bilibili calls: rate and concurrency halve on 412/429/-799
+# and creep back up on success; an endpoint that keeps getting throttled fails
+# fast for CIRCUIT_COOLDOWN seconds before a single probe is let through.
+MAX_CONCURRENCY = int(os.getenv("OPENCLAW_MAX_CONCURRENCY", "4"))
+MAX_RATE = float(os.getenv("OPENCLAW_MAX_RATE", str(1 / REQUEST_SLEEP if REQUEST_SLEEP else 10)))
+MIN_RATE = float(os.getenv("OPENCLAW_MIN_RATE", "0.2"))
+CIRCUIT_THRESHOLD = int(os.getenv("OPENCLAW_CIRCUIT_THRESHOLD", "5"))
+CIRCUIT_COOLDOWN = float(os.getenv("OPENCLAW_CIRCUIT_COOLDOWN", "60"))
+
+# Identity pool: a JSON list of {name, cookie, sessdata, user_agent, proxy,
+# max_rate}; defaults to data/identities.json when present, else the single
+# BILI_SESSDATA/BILI_COOKIE identity. Throttled identities sit out
+# IDENTITY_BENCH seconds, doubling per repeat strike up to IDENTITY_BENCH_MAX.
+IDENTITIES_PATH = os.getenv("OPENCLAW_IDENTITIES", "").strip()
+IDENTITY_BENCH = float(os.getenv("OPENCLAW_IDENTITY_BENCH", "120"))
+IDENTITY_BENCH_MAX = float(os.getenv("OPENCLAW_IDENTITY_BENCH_MAX", "1800"))
+
 FOLLOWER_MAX = int(os.getenv("OPENCLAW_FOLLOWER_MAX", "10000"))
 KEYWORD_DAYS = int(os.getenv("OPENCLAW_KEYWORD_DAYS", "7"))
 KEYWORD_TOPK = int(os.getenv("OPENCLAW_KEYWORD_TOPK", "10"))
+KEYWORD_PAGES = max(1, int(os.getenv("OPENCLAW_KEYWORD_PAGES", "3")))
+# "" keeps relevance order; "pubdate" pages newest-first and stops at the window edge.
+KEYWORD_ORDER = os.getenv("OPENCLAW_KEYWORD_ORDER", "").strip().lower()
+# keyword-collect store: use it for the daily report if every keyword was
+# collected within this many hours; refresh follower counts older than the TTL.
+KEYWORD_STORE_MAX_AGE = float(os.getenv("OPENCLAW_KEYWORD_STORE_MAX_AGE", "6"))
+KEYWORD_FOLLOWER_TTL = float(os.getenv("OPENCLAW_KEYWORD_FOLLOWER_TTL", "24"))
+# "play" ranks by total views; "velocity" by views/hour over TRENDING_HOURS.
+KEYWORD_RANK = os.getenv("OPENCLAW_KEYWORD_RANK", "play").strip().lower()
+TRENDING_HOURS = float(os.getenv("OPENCLAW_TRENDING_HOURS", "24"))
+STATS_RETENTION_DAYS = int(os.getenv("OPENCLAW_STATS_RETENTION_DAYS", "30"))
+KEYWORD_WORKERS = max(1, int(os.getenv("OPENCLAW_KEYWORD_WORKERS", "4")))
+# Local search index (data/search/) keeps videos published within this many days.
+SEARCH_INDEX_DAYS = int(os.getenv("OPENCLAW_SEARCH_DAYS", "90"))
+# Seen-video index (data/seen/): a video delivered to a chat is not pushed to
+# it again. Its Bloom prefilter is sized for SEEN_CAPACITY deliveries at
+# SEEN_ERROR false positives and doubles when full.
+SEEN_CAPACITY = int(os.getenv("OPENCLAW_SEEN_CAPACITY", "1000000"))
+SEEN_ERROR = float(os.getenv("OPENCLAW_SEEN_ERROR", "0.001"))
+
+# up-watch: a failing UP is retried after UP_RETRY_BASE * 2^(failures-1)
+# seconds (capped at UP_RETRY_MAX); permanent errors re-check after
+# UP_QUARANTINE_DAYS.
+UP_RETRY_BASE = float(os.getenv("OPENCLAW_UP_RETRY_BASE", "1800"))
+UP_RETRY_MAX = float(os.getenv("OPENCLAW_UP_RETRY_MAX", "86400"))
+UP_QUARANTINE_DAYS = float(os.getenv("OPENCLAW_UP_QUARANTINE_DAYS", "7"))
+
+# Long-running processes coalesce state writes into one flush per delay.
+STATE_FLUSH_DELAY = float(os.getenv("OPENCLAW_STATE_FLUSH_DELAY", "0.5"))
+
+# Checkpoints (data/checkpoints/): long runs save progress at most every
+# CHECKPOINT_EVERY seconds; a rerun resumes from one younger than
+# CHECKPOINT_MAX_AGE hours.
+CHECKPOINT_EVERY = float(os.getenv("OPENCLAW_CHECKPOINT_EVERY", "10"))
+CHECKPOINT_MAX_AGE = float(os.getenv("OPENCLAW_CHECKPOINT_MAX_AGE", "6"))
+
+# Run ledger (data/runs.jsonl) keeps records for this many days.
+LEDGER_DAYS = int(os.getenv("OPENCLAW_LEDGER_DAYS", "90"))
+
+# Sharded up-watch: UPs hash into SHARD_COUNT shards claimed with leases.
+SHARD_COUNT = max(1, int(os.getenv("OPENCLAW_SHARDS", "16")))
+SHARD_LEASE = float(os.getenv("OPENCLAW_SHARD_LEASE", "300"))
+SHARD_CYCLE = int(os.getenv("OPENCLAW_SHARD_CYCLE", "3600"))
 
 
 def _env_bool(key: str, default: bool = True) -> bool:
@@ -63,4 +132,5 @@ def _env_bool(key: str, default: bool = True) -> bool:
 
 
 ENABLE_KEYWORD = _env_bool("OPENCLAW_ENABLE_KEYWORD", True)
+SEEN_DEDUP = _env_bool("OPENCLAW_SEEN_DEDUP", True)
 DEBUG = _env_bool("OPENCLAW_DEBUG", False)
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import gzip
+import io
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+from typing import IO, Any, Dict, Iterable, Iterator, List, Tuple
+
+from .jsonlib import dumps, dumps_str, loads
+from .ledger import iter_runs
+from .search_index import DOC_FIELDS, SEARCH_DIR
+from .storage import get_subscribers, load_state
+
+VIDEO_FIELDS = DOC_FIELDS + ("fetched_at",)
+UP_FIELDS = ("mid", "name", "added_at", "subscribers")
+RUN_FIELDS = (
+    "task",
+    "started_at",
+    "ended_at",
+    "duration",
+    "ups_checked",
+    "ups_skipped",
+    "new_videos",
+    "items",
+    "requests",
+    "retries",
+    "throttled",
+    "notify_ms",
+    "delay_s",
+    "errors",
+    "failed",
+)
+DATASETS: Dict[str, Tuple[str, ...]] = {
+    "videos": VIDEO_FIELDS,
+    "ups": UP_FIELDS,
+    "runs": RUN_FIELDS,
+}
+# --since filters on this field unless --by says otherwise
+SINCE_FIELDS = {"videos": "fetched_at", "ups": "added_at", "runs": "started_at"}
+
+COLUMNAR_MAGIC = b"OCLC"
+ROW_GROUP_SIZE = 10000
+
+
+def parse_since(text: str, now: float | None = None) -> int:
+    # "7d", "12h", "2024-05-01", "2024-05-01T08:00", or a unix timestamp
+    text = text.strip()
+    now = now or time.time()
+    m = re.fullmatch(r"(\d+)\s*([dh])", text)
+    if m:
+        return int(now - int(m.group(1)) * (86400 if m.group(2) == "d" else 3600))
+    if text.isdigit():
+        return int(text)
+    try:
+        return int(dt.datetime.fromisoformat(text).timestamp())
+    except ValueError:
+        raise RuntimeError(f"Bad --since value: {text!r}")
+
+
+def _ts(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str) and value:
+        # state.json keeps added_at as ISO-8601 UTC with a trailing Z
+        try:
+            parsed = dt.datetime.fromisoformat(value.rstrip("Z"))
+        except ValueError:
+            return 0
+        return parsed.replace(tzinfo=dt.timezone.utc).timestamp()
+    return 0
+
+
+def iter_videos() -> Iterator[Dict[str, Any]]:
+    # one row per stored version; a re-titled video appears again with a newer
+    # fetched_at, so consumers keep the latest row per bvid
+    path = os.path.join(SEARCH_DIR, "docs.jsonl")
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                yield loads(line)
+            except ValueError:
+                continue
+
+
+def iter_ups() -> Iterator[Dict[str, Any]]:
+    state = load_state()
+    for up in state.get("ups", []):
+        yield {**up, "subscribers": get_subscribers(state, up.get("mid"))}
+
+
+def iter_rows(dataset: str, since: int | None = None, by: str | None = None) -> Iterator[Dict]:
+    if dataset == "videos":
+        rows: Iterable[Dict[str, Any]] = iter_videos()
+    elif dataset == "ups":
+        rows = iter_ups()
+    elif dataset == "runs":
+        rows = iter_runs()
+    else:
+        raise RuntimeError(f"Unknown dataset: {dataset}")
+    field = by or SINCE_FIELDS[dataset]
+    for row in rows:
+        if since is None or _ts(row.get(field)) >= since:
+            yield row
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return dumps_str(value)
+    return "" if value is None else value
+
+
+def write_csv(rows: Iterable[Dict], fields: Tuple[str, ...], out: IO[str]) -> int:
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    n = 0
+    for row in rows:
+        writer.writerow([_cell(row.get(k)) for k in fields])
+        n += 1
+    return n
+
+
+def write_jsonl(rows: Iterable[Dict], fields: Tuple[str, ...], out: IO[bytes]) -> int:
+    n = 0
+    for row in rows:
+        out.write(dumps({k: row.get(k) for k in fields}) + b"\n")
+        n += 1
+    return n
+
+
+class ColumnarWriter:
+    # Parquet-like layout without the dependency:
+    #   row group* | footer JSON | footer length (uint32 LE) | b"OCLC"
+    # Each row group stores every column as its own zlib-compressed JSON array,
+    # so readers can pull single columns, and the footer keeps per-group
+    # min/max of numeric columns so incremental readers can skip whole groups.
+
+    def __init__(self, out: IO[bytes], fields: Tuple[str, ...], group_size: int = ROW_GROUP_SIZE):
+        self.out = out
+        self.fields = fields
+        self.group_size = group_size
+        self.offset = 0
+        self.groups: List[Dict[str, Any]] = []
+        self._buffer: Dict[str, List[Any]] = {k: [] for k in fields}
+        self._rows = 0
+
+    def write(self, row: Dict[str, Any]) -> None:
+        for k in self.fields:
+            self._buffer[k].append(row.get(k))
+        self._rows += 1
+        if self._rows >= self.group_size:
+            self._flush_group()
+
+    def _flush_group(self) -> None:
+        if not self._rows:
+            return
+        group: Dict[str, Any] = {"rows": self._rows, "columns": {}}
+        for k in self.fields:
+            values = self._buffer[k]
+            block = zlib.compress(dumps(values), 6)
+            self.out.write(block)
+            chunk: Dict[str, Any] = {"offset": self.offset, "length": len(block)}
+            numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+            if numbers:
+                chunk["min"], chunk["max"] = min(numbers), max(numbers)
+            group["columns"][k] = chunk
+            self.offset += len(block)
+            self._buffer[k] = []
+        self.groups.append(group)
+        self._rows = 0
+
+    def close(self) -> int:
+        self._flush_group()
+        footer = dumps(
+            {"format": "openclaw-columnar/1", "fields": list(self.fields), "row_groups": self.groups}
+        )
+        self.out.write(footer + struct.pack("<I", len(footer)) + COLUMNAR_MAGIC)
+        return sum(g["rows"] for g in self.groups)
+
+
+def write_columnar(rows: Iterable[Dict], fields: Tuple[str, ...], out: IO[bytes]) -> int:
+    writer = ColumnarWriter(out, fields)
+    for row in rows:
+        writer.write(row)
+    return writer.close()
+
+
+def read_columnar_footer(f: IO[bytes]) -> Dict[str, Any]:
+    f.seek(-8, os.SEEK_END)
+    size, magic = struct.unpack("<I4s", f.read(8))
+    if magic != COLUMNAR_MAGIC:
+        raise RuntimeError("Not an openclaw columnar file")
+    f.seek(-8 - size, os.SEEK_END)
+    return loads(f.read(size))
+
+
+def read_columnar(
+    path: str, columns: List[str] | None = None, min_values: Dict[str, float] | None = None
+) -> Iterator[Dict[str, Any]]:
+    # stream rows back one row group at a time; min_values skips groups whose
+    # column max is below the bound (e.g. {"fetched_at": last_export_ts})
+    with open(path, "rb") as f:
+        footer = read_columnar_footer(f)
+        columns = columns or footer["fields"]
+        for group in footer["row_groups"]:
+            chunks = group["columns"]
+            if min_values and any(
+                chunks[k].get("max") is not None and chunks[k]["max"] < v
+                for k, v in min_values.items()
+            ):
+                continue
+            data = {}
+            for k in columns:
+                f.seek(chunks[k]["offset"])
+                data[k] = loads(zlib.decompress(f.read(chunks[k]["length"])))
+            for i in range(group["rows"]):
+                yield {k: data[k][i] for k in columns}
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "columnar": write_columnar}
+EXTENSIONS = {"csv": ".csv", "jsonl": ".jsonl", "columnar": ".oclc"}
+
+
+def default_output(dataset: str, fmt: str, compress: bool) -> str:
+    stamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+    gz = ".gz" if compress and fmt != "columnar" else ""
+    return f"openclaw-{dataset}-{stamp}{EXTENSIONS[fmt]}{gz}"
+
+
+def export(
+    dataset: str,
+    fmt: str,
+    output: str,
+    since: int | None = None,
+    by: str | None = None,
+    compress: bool = True,
+) -> int:
+    # columnar blocks are compressed internally; csv/jsonl are gzipped whole
+    fields = DATASETS[dataset]
+    rows = iter_rows(dataset, since, by)
+    writer = WRITERS[fmt]
+    to_stdout = output == "-"
+    tmp = output + ".tmp"
+    raw: IO[bytes] = sys.stdout.buffer if to_stdout else open(tmp, "wb")
+    try:
+        # csv needs a text layer; jsonl and columnar write encoded bytes as-is
+        binary: IO[bytes] = raw
+        if compress and fmt != "columnar":
+            binary = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+        if fmt == "csv":
+            text = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+            n = writer(rows, fields, text)
+            text.flush()
+            text.detach()
+        else:
+            n = writer(rows, fields, binary)
+        if binary is not raw:
+            binary.close()
+        raw.flush()
+    except BaseException:
+        if not to_stdout:
+            raw.close()
+            os.remove(tmp)
+        raise
+    if not to_stdout:
+        # atomic: a failed export never leaves a truncated file behind
+        raw.close()
+        os.replace(tmp, output)
+    return n
@@ -18,5 +18,9 @@ class FeishuNotifier:
             "msg_type": "text",
             "content": {"text": text},
         }
-        return self.http.post_json(self.webhook, payload)
+        data = self.http.post_json(self.webhook, payload)
+        # the webhook answers HTTP 200 with a non-zero code when it rejects a message
+        if data.get("code", data.get("StatusCode", 0)) != 0:
+            raise RuntimeError(f"Feishu webhook error: {data}")
+        return data
 
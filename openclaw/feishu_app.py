@@ -5,10 +5,10 @@ from typing import Dict
 
 import requests
 
-from .config import FEISHU_APP_ID, FEISHU_APP_SECRET
+from .config import FEISHU_API_BASE, FEISHU_APP_ID, FEISHU_APP_SECRET
 
-TOKEN_URL = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
-SEND_URL = "https://open.feishu.cn/open-apis/im/v1/messages"
+TOKEN_URL = f"{FEISHU_API_BASE}/open-apis/auth/v3/tenant_access_token/internal"
+SEND_URL = f"{FEISHU_API_BASE}/open-apis/im/v1/messages"
 
 
 class FeishuAppClient:
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+from typing import Any, Dict
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # optional: pip install "openclaw[encrypt]"
+    Cipher = None
+
+from .jsonlib import dumps, loads
+
+
+class FeishuCipher:
+    # Decrypts `{"encrypt": ...}` callbacks and checks X-Lark-Signature.
+    # The AES key is sha256(encrypt_key); derive it once and reuse it.
+
+    def __init__(self, encrypt_key: str) -> None:
+        if Cipher is None:
+            raise RuntimeError(
+                "FEISHU_ENCRYPT_KEY is set but 'cryptography' is not installed "
+                '(pip install "openclaw[encrypt]")'
+            )
+        self._sign_key = encrypt_key.encode("utf-8")
+        self._aes = algorithms.AES(hashlib.sha256(self._sign_key).digest())
+
+    def decrypt(self, encrypted: str) -> Dict[str, Any]:
+        raw = base64.b64decode(encrypted)
+        if len(raw) < 32 or len(raw) % 16:
+            raise ValueError("bad encrypt payload length")
+        # first block is the IV, the rest is AES-256-CBC with PKCS7 padding
+        decryptor = Cipher(self._aes, modes.CBC(raw[:16])).decryptor()
+        plain = decryptor.update(raw[16:]) + decryptor.finalize()
+        pad = plain[-1]
+        if not 1 <= pad <= 16 or plain[-pad:] != bytes([pad]) * pad:
+            raise ValueError("bad padding")
+        return loads(plain[:-pad])
+
+    def signature(self, timestamp: str, nonce: str, body: bytes) -> str:
+        h = hashlib.sha256()
+        h.update(timestamp.encode("utf-8"))
+        h.update(nonce.encode("utf-8"))
+        h.update(self._sign_key)
+        h.update(body)
+        return h.hexdigest()
+
+    def verify(self, timestamp: str, nonce: str, body: bytes, signature: str) -> bool:
+        return hmac.compare_digest(self.signature(timestamp, nonce, body), signature or "")
+
+
+def encrypt_payload(encrypt_key: str, payload: Dict[str, Any], iv: bytes) -> str:
+    # inverse of FeishuCipher.decrypt; used by the benchmark and for local testing
+    if Cipher is None:
+        raise RuntimeError("'cryptography' is not installed")
+    plain = dumps(payload)
+    pad = 16 - len(plain) % 16
+    plain += bytes([pad]) * pad
+    key = hashlib.sha256(encrypt_key.encode("utf-8")).digest()
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    return base64.b64encode(iv + encryptor.update(plain) + encryptor.finalize()).decode("ascii")
@@ -1,8 +1,8 @@
 import random
+import threading
 import time
 from typing import Any, Dict, Iterable, Set
-
-import requests
+from urllib.parse import urlparse
 
 from .config import (
     BILI_COOKIE,
@@ -11,38 +11,69 @@ from .config import (
     REQUEST_RETRIES,
     REQUEST_SLEEP,
     REQUEST_TIMEOUT,
-    USER_AGENT,
 )
+from .identity import AllBenched, Identity, IdentityPool
+from .jsonlib import dumps, loads
+from .throttle import PRIORITY_INTERACTIVE, Limiter
+from .transport import build_transport
 
 
-class HttpClient:
+class RequestCounters:
+    # Process-wide attempt counters; the run ledger diffs them per task run.
+
     def __init__(self) -> None:
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "User-Agent": USER_AGENT,
-                "Referer": "https://www.bilibili.com/",
-                "Origin": "https://www.bilibili.com",
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            }
-        )
-        if BILI_SESSDATA:
-            self.session.cookies.set("SESSDATA", BILI_SESSDATA)
-        if BILI_COOKIE:
-            self._load_cookie_string(BILI_COOKIE)
-
-    def _load_cookie_string(self, cookie: str) -> None:
-        # Format: "key=value; key2=value2"
-        for part in cookie.split(";"):
-            part = part.strip()
-            if not part or "=" not in part:
-                continue
-            k, v = part.split("=", 1)
-            self.session.cookies.set(k.strip(), v.strip())
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+
+    def add(self, attempt: int, throttled: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            self.retries += 1 if attempt else 0
+            self.throttled += 1 if throttled else 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "retries": self.retries, "throttled": self.throttled}
+
+
+COUNTERS = RequestCounters()
+
+
+class ThrottledError(RuntimeError):
+    # still throttled (412/429/-799, or every identity benched) after every retry
+    pass
+
+
+class HttpClient:
+    def __init__(
+        self,
+        limiter: Limiter | None = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        pool: IdentityPool | None = None,
+        transport=None,
+    ) -> None:
+        self.limiter = limiter
+        self.priority = priority
+        # get_json rotates over the pool's identities; post_json and
+        # pool-less clients use self.transport, built on first use
+        self.pool = pool
+        self._transport = transport
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            self._transport = build_transport(BILI_COOKIE, BILI_SESSDATA)
+        return self._transport
 
     def _sleep(self, attempt: int) -> None:
         jitter = random.random() * 0.2
+        if self.limiter is not None:
+            # the limiter paces first attempts; only back off before retries
+            if attempt:
+                time.sleep(REQUEST_BACKOFF * (2**attempt) + jitter)
+            return
         time.sleep(REQUEST_SLEEP + REQUEST_BACKOFF * (2**attempt) + jitter)
 
     def get_json(
@@ -53,25 +84,59 @@ class HttpClient:
         retry_on_codes: Set[int] | None = None,
     ) -> Dict[str, Any]:
         retry_on_statuses = set(retry_on_statuses or [])
+        endpoint = urlparse(url).path
         for attempt in range(REQUEST_RETRIES + 1):
             self._sleep(attempt)
-            resp = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
-            if resp.status_code in retry_on_statuses and attempt < REQUEST_RETRIES:
-                continue
-            resp.raise_for_status()
-            data = resp.json()
-            if retry_on_codes and data.get("code") in retry_on_codes and attempt < REQUEST_RETRIES:
-                continue
-            return data
+            # identity before the limiter slot: never hold a slot while the pool is benched
+            ident: Identity | None = None
+            if self.pool is not None:
+                try:
+                    ident = self.pool.acquire()
+                except AllBenched as exc:
+                    if attempt < REQUEST_RETRIES:
+                        continue
+                    raise ThrottledError(str(exc)) from exc
+            if self.limiter is not None:
+                self.limiter.acquire(endpoint, self.priority)
+            transport = ident.transport if ident is not None else self.transport
+            throttled = ok = False
+            try:
+                resp = transport.get(url, params, REQUEST_TIMEOUT)
+                throttled = resp.status_code in retry_on_statuses
+                if throttled and attempt < REQUEST_RETRIES:
+                    continue
+                if throttled:
+                    raise ThrottledError(f"HTTP {resp.status_code} from {endpoint}")
+                resp.raise_for_status()
+                # parse the raw body; skips requests' text decoding
+                data = loads(resp.content)
+                throttled = bool(retry_on_codes) and data.get("code") in retry_on_codes
+                if throttled and attempt < REQUEST_RETRIES:
+                    continue
+                if throttled:
+                    raise ThrottledError(f"code {data.get('code')} from {endpoint}")
+                ok = True
+                return data
+            finally:
+                COUNTERS.add(attempt, throttled)
+                shared = throttled
+                if ident is not None and (ok or throttled):
+                    # a benched identity absorbs its own throttle while others are free
+                    shared = self.pool.report(ident, throttled)
+                if self.limiter is not None:
+                    self.limiter.release(endpoint, throttled=shared, ok=ok)
         # should not reach here
         resp.raise_for_status()
-        return resp.json()
+        return loads(resp.content)
 
     def post_json(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         for attempt in range(REQUEST_RETRIES + 1):
             self._sleep(attempt)
-            resp = self.session.post(url, json=payload, timeout=REQUEST_TIMEOUT)
+            resp = self.transport.post(
+                url, dumps(payload), {"Content-Type": "application/json"}, REQUEST_TIMEOUT
+            )
+            COUNTERS.add(attempt, resp.status_code in (412, 429))
             if resp.status_code in (412, 429) and attempt < REQUEST_RETRIES:
                 continue
             resp.raise_for_status()
-            return resp.json()
+            return loads(resp.content)
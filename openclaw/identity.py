@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from .config import (
+    BILI_COOKIE,
+    BILI_SESSDATA,
+    DATA_DIR,
+    IDENTITIES_PATH,
+    IDENTITY_BENCH,
+    IDENTITY_BENCH_MAX,
+    MAX_RATE,
+)
+from .jsonlib import load_file
+from .transport import build_transport
+
+
+class Identity:
+    # One Bilibili account / egress: its own transport (cookies, UA, proxy),
+    # its own request budget, and a bench timer set when it gets throttled.
+
+    def __init__(
+        self,
+        name: str,
+        cookie: str = "",
+        sessdata: str = "",
+        user_agent: str = "",
+        proxy: str = "",
+        max_rate: float | None = MAX_RATE,
+    ) -> None:
+        self.name = name
+        self.transport = build_transport(cookie, sessdata, user_agent, proxy)
+        self.max_rate = max_rate
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.next_at = 0.0
+        self.benched_until = 0.0
+        self.strikes = 0
+        self.requests = 0
+        self.throttled = 0
+
+
+class AllBenched(RuntimeError):
+    # every identity is benched; the caller backs off instead of queueing
+    pass
+
+
+class IdentityPool:
+    # Spreads Bilibili requests over identities. Each request goes to the
+    # unbenched identity whose budget frees up first. A throttled identity
+    # (412/429/-799) is benched for IDENTITY_BENCH seconds, doubling on
+    # repeat strikes, while the others keep going.
+
+    def __init__(
+        self,
+        identities: List[Identity],
+        bench: float = IDENTITY_BENCH,
+        bench_max: float = IDENTITY_BENCH_MAX,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not identities:
+            raise RuntimeError("Identity pool is empty")
+        self.identities = identities
+        self.bench = bench
+        self.bench_max = bench_max
+        self.clock = clock
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    @property
+    def total_rate(self) -> float | None:
+        # combined budget, or None when an identity is unbudgeted
+        rates = [i.max_rate for i in self.identities]
+        return None if not all(rates) else sum(rates)
+
+    def acquire(self) -> Identity:
+        with self._cond:
+            while True:
+                now = self.clock()
+                ready = [i for i in self.identities if i.benched_until <= now]
+                if ready:
+                    ident = min(ready, key=lambda i: i.next_at)
+                    wait = ident.next_at - now
+                    if wait <= 0:
+                        ident.next_at = max(now, ident.next_at) + ident.interval
+                        ident.requests += 1
+                        return ident
+                else:
+                    # a bench lasts minutes: fail fast so the request's own
+                    # retry/backoff (and the shared limiter) handle it
+                    wait = min(i.benched_until for i in self.identities) - now
+                    raise AllBenched(f"every identity benched for another {wait:.0f}s")
+                self._cond.wait(timeout=wait)
+
+    def report(self, ident: Identity, throttled: bool) -> bool:
+        # Returns True when the throttle should count against the shared
+        # limiter: a lone identity (old behaviour) or every identity benched.
+        with self._cond:
+            if not throttled:
+                ident.strikes = 0
+                return False
+            ident.throttled += 1
+            if len(self.identities) == 1:
+                return True
+            now = self.clock()
+            ident.strikes += 1
+            ident.benched_until = now + min(self.bench_max, self.bench * 2 ** (ident.strikes - 1))
+            self._cond.notify_all()
+            return all(i.benched_until > now for i in self.identities)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            now = self.clock()
+            return [
+                {
+                    "name": i.name,
+                    "requests": i.requests,
+                    "throttled": i.throttled,
+                    "benched_for": round(max(0.0, i.benched_until - now), 1),
+                }
+                for i in self.identities
+            ]
+
+
+def load_identities(path: str) -> List[Identity]:
+    # [{"name", "cookie", "sessdata", "user_agent", "proxy", "max_rate"}, ...]
+    entries = load_file(path)
+    if isinstance(entries, dict):
+        entries = entries.get("identities", [])
+    identities = []
+    for n, entry in enumerate(entries):
+        identities.append(
+            Identity(
+                name=str(entry.get("name") or f"identity-{n}"),
+                cookie=entry.get("cookie", ""),
+                sessdata=entry.get("sessdata", ""),
+                user_agent=entry.get("user_agent", ""),
+                proxy=entry.get("proxy", ""),
+                max_rate=float(entry.get("max_rate") or MAX_RATE),
+            )
+        )
+    return identities
+
+
+def default_identities() -> List[Identity]:
+    path = IDENTITIES_PATH or os.path.join(DATA_DIR, "identities.json")
+    if os.path.exists(path):
+        return load_identities(path)
+    if IDENTITIES_PATH:
+        raise RuntimeError(f"OPENCLAW_IDENTITIES file not found: {path}")
+    # single BILI_SESSDATA/BILI_COOKIE identity, paced by the shared limiter only
+    return [Identity("default", BILI_COOKIE, BILI_SESSDATA, max_rate=None)]
+
+
+_pool: IdentityPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_identity_pool() -> IdentityPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = IdentityPool(default_identities())
+        return _pool
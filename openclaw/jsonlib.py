@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional: pip install "openclaw[fast]"
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(obj: Any) -> Any:
+    # Video/UpProfile records and anything else dict-like
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTS = orjson.OPT_NON_STR_KEYS
+    _PRETTY = _OPTS | orjson.OPT_INDENT_2
+
+    def loads(data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any, pretty: bool = False) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_PRETTY if pretty else _OPTS)
+
+else:
+    _compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+    _pretty = json.JSONEncoder(ensure_ascii=False, indent=2, default=_default)
+
+    def loads(data: bytes | str) -> Any:
+        # all our inputs are UTF-8; skip json's encoding detection
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode("utf-8")
+        return json.loads(data)
+
+    def dumps(obj: Any, pretty: bool = False) -> bytes:
+        return (_pretty if pretty else _compact).encode(obj).encode("utf-8")
+
+
+def dumps_str(obj: Any, pretty: bool = False) -> str:
+    return dumps(obj, pretty).decode("utf-8")
+
+
+def load_file(path: str) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(path: str, obj: Any, pretty: bool = False) -> None:
+    with open(path, "wb") as f:
+        f.write(dumps(obj, pretty))
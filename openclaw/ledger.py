@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import math
+import os
+import statistics
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List
+
+from .config import LEDGER_DAYS
+from .http import COUNTERS
+from .jsonlib import dumps, loads
+from .storage import DATA_DIR, file_lock
+
+LEDGER_PATH = os.path.join(DATA_DIR, "runs.jsonl")
+
+
+class RunRecord:
+    # Collects one task run's numbers; finish() appends them to the ledger.
+
+    def __init__(self, task: str) -> None:
+        self.task = task
+        self.started_at = time.time()
+        self._counters = COUNTERS.snapshot()
+        self.ups_checked = 0
+        self.ups_skipped = 0
+        self.new_videos = 0
+        self.items = 0
+        self.notify_ms: List[float] = []
+        self.delays: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.failed: str | None = None
+
+    def __enter__(self) -> "RunRecord":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # crashed runs are recorded too, with the exception that ended them
+        if exc is not None:
+            self.error(exc)
+            self.failed = f"{exc_type.__name__}: {exc}"[:200]
+        self.finish()
+
+    def error(self, exc: BaseException) -> None:
+        name = type(exc).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def saw_new(self, videos: Iterable[Dict[str, Any]]) -> None:
+        # publish -> detection delay of each new video
+        now = time.time()
+        for v in videos:
+            self.new_videos += 1
+            if v.get("pubdate"):
+                self.delays.append(max(0.0, now - v.get("pubdate")))
+
+    def track(self, notifier):
+        return _TimedNotifier(notifier, self)
+
+    def finish(self) -> Dict[str, Any]:
+        ended = time.time()
+        counters = COUNTERS.snapshot()
+        record = {
+            "task": self.task,
+            "started_at": round(self.started_at, 3),
+            "ended_at": round(ended, 3),
+            "duration": round(ended - self.started_at, 3),
+            "ups_checked": self.ups_checked,
+            "ups_skipped": self.ups_skipped,
+            "new_videos": self.new_videos,
+            "items": self.items,
+            "requests": counters["requests"] - self._counters["requests"],
+            "retries": counters["retries"] - self._counters["retries"],
+            "throttled": counters["throttled"] - self._counters["throttled"],
+            "notify_ms": round(statistics.mean(self.notify_ms), 1) if self.notify_ms else None,
+            "delay_s": round(statistics.median(self.delays)) if self.delays else None,
+            "errors": self.errors,
+            "failed": self.failed,
+        }
+        append_run(record)
+        return record
+
+
+class _TimedNotifier:
+    def __init__(self, notifier, run: RunRecord) -> None:
+        self._notifier = notifier
+        self._run = run
+
+    def send_text(self, text: str):
+        return self._timed(self._notifier.send_text, text)
+
+    def send_to(self, subscriber: str, text: str):
+        return self._timed(self._notifier.send_to, subscriber, text)
+
+    def _timed(self, send, *args):
+        t0 = time.monotonic()
+        try:
+            return send(*args)
+        finally:
+            self._run.notify_ms.append((time.monotonic() - t0) * 1000)
+
+
+def append_run(record: Dict[str, Any], path: str = LEDGER_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with file_lock(path + ".lock"):
+        with open(path, "ab") as f:
+            f.write(dumps(record) + b"\n")
+        _prune(path, time.time() - LEDGER_DAYS * 86400)
+
+
+def _prune(path: str, cutoff: float) -> None:
+    # cheap check on the oldest line; rewrite only when something expired
+    with open(path, "rb") as f:
+        first = f.readline()
+    try:
+        if loads(first).get("started_at", 0) >= cutoff:
+            return
+    except ValueError:
+        pass
+    tmp = path + ".tmp"
+    with open(path, "rb") as src, open(tmp, "wb") as dst:
+        for line in src:
+            try:
+                if loads(line).get("started_at", 0) >= cutoff:
+                    dst.write(line)
+            except ValueError:
+                continue
+    os.replace(tmp, path)
+
+
+def iter_runs(task: str | None = None, path: str = LEDGER_PATH) -> Iterator[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                run = loads(line)
+            except ValueError:
+                continue
+            if task and run.get("task") != task:
+                continue
+            yield run
+
+
+def load_runs(
+    last: int | None = None, task: str | None = None, path: str = LEDGER_PATH
+) -> List[Dict[str, Any]]:
+    if last:
+        return list(deque(iter_runs(task, path), maxlen=last))
+    return list(iter_runs(task, path))
+
+
+def percentile(values: List[float], p: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    # nearest-rank
+    rank = math.ceil(p / 100 * len(ordered))
+    return ordered[min(len(ordered), max(1, rank)) - 1]
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    by_task: Dict[str, List[Dict[str, Any]]] = {}
+    for run in runs:
+        by_task.setdefault(run.get("task", "?"), []).append(run)
+
+    summary: Dict[str, Any] = {}
+    for task, items in by_task.items():
+        durations = [r.get("duration", 0) for r in items]
+        errors: Dict[str, int] = {}
+        for r in items:
+            for name, n in (r.get("errors") or {}).items():
+                errors[name] = errors.get(name, 0) + n
+        # trend: mean duration of the newer half vs the older half
+        half = len(durations) // 2
+        trend = None
+        if half and statistics.mean(durations[:half]):
+            trend = round(statistics.mean(durations[half:]) / statistics.mean(durations[:half]), 2)
+        summary[task] = {
+            "runs": len(items),
+            "last_run": items[-1].get("started_at"),
+            "duration": {
+                "p50": percentile(durations, 50),
+                "p90": percentile(durations, 90),
+                "p99": percentile(durations, 99),
+                "max": max(durations),
+                "trend": trend,
+            },
+            "requests_p50": percentile([r.get("requests", 0) for r in items], 50),
+            "retries_total": sum(r.get("retries", 0) for r in items),
+            "new_videos_total": sum(r.get("new_videos", 0) for r in items),
+            "delay_s_p50": percentile(
+                [r["delay_s"] for r in items if r.get("delay_s") is not None], 50
+            ),
+            "errors": errors,
+            "failed": sum(1 for r in items if r.get("failed")),
+        }
+    return summary
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, Tuple
+
+from .utils import parse_count
+
+
+class Record:
+    # Slotted record that also answers the dict-style reads (get, [], in) the
+    # report/storage code already does on API results.
+    __slots__: Tuple[str, ...] = ()
+    _derived: Tuple[str, ...] = ()
+    _aliases: Dict[str, str] = {}
+
+    def _name(self, key: str) -> str | None:
+        name = self._aliases.get(key, key)
+        if name in self.__slots__ or name in self._derived:
+            return name
+        return None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        name = self._name(key)
+        return default if name is None else getattr(self, name)
+
+    def __getitem__(self, key: str) -> Any:
+        name = self._name(key)
+        if name is None:
+            raise KeyError(key)
+        return getattr(self, name)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        name = self._name(key)
+        if name is None or name in self._derived:
+            raise KeyError(key)
+        setattr(self, name, value)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._name(key) is not None
+
+    def keys(self) -> Iterator[str]:
+        yield from self.__slots__
+        yield from self._derived
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for k in self.keys():
+            yield k, getattr(self, k)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__[:2])
+        return f"{type(self).__name__}({fields})"
+
+
+class Video(Record):
+    __slots__ = (
+        "bvid",
+        "aid",
+        "title",
+        "description",
+        "pic",
+        "pubdate",
+        "length",
+        "play",
+        "comment",
+        "mid",
+        "author",
+        "follower",
+    )
+    _derived = ("url",)
+
+    def __init__(
+        self,
+        bvid: str | None = None,
+        aid: int | None = None,
+        title: str | None = None,
+        description: str | None = None,
+        pic: str | None = None,
+        pubdate: Any = None,
+        length: str | None = None,
+        play: Any = None,
+        comment: Any = None,
+        mid: Any = None,
+        author: str | None = None,
+        follower: int | None = None,
+    ) -> None:
+        self.bvid = bvid
+        self.aid = aid
+        self.title = title
+        self.description = description
+        self.pic = pic
+        # numeric fields are parsed once here instead of on every read
+        self.pubdate = parse_count(pubdate) or None
+        self.length = length
+        self.play = parse_count(play)
+        self.comment = parse_count(comment)
+        self.mid = str(mid) if mid is not None else None
+        self.author = author
+        self.follower = follower
+
+    @property
+    def url(self) -> str | None:
+        return f"https://www.bilibili.com/video/{self.bvid}" if self.bvid else None
+
+
+class UpProfile(Record):
+    __slots__ = ("mid", "name", "sign", "level", "face", "follower")
+    _aliases = {"uname": "name", "fans": "follower"}
+
+    def __init__(
+        self,
+        mid: Any = None,
+        name: str | None = None,
+        sign: str | None = None,
+        level: int | None = None,
+        face: str | None = None,
+        follower: Any = None,
+    ) -> None:
+        self.mid = str(mid) if mid is not None else None
+        self.name = name
+        self.sign = sign
+        self.level = level
+        self.face = face
+        self.follower = parse_count(follower)
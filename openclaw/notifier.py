@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+from typing import Dict
+
 from .config import NOTIFY_CHANNEL, TG_BOT_TOKEN, TG_CHAT_ID
 from .feishu import FeishuNotifier
-from .telegram import TelegramNotifier
+from .feishu_app import FeishuAppClient
+from .storage import DEFAULT_SUBSCRIBER
+from .telegram import TelegramClient, TelegramNotifier
 
 
 def get_notifier():
@@ -13,3 +17,35 @@ def get_notifier():
     if TG_BOT_TOKEN and TG_CHAT_ID:
         return TelegramNotifier()
     return FeishuNotifier()
+
+
+class SubscriberNotifier:
+    # Routes a message by subscriber id: "default" -> get_notifier(),
+    # "feishu:<chat_id>" -> Feishu app bot, "telegram:<chat_id>" -> Telegram bot.
+    # Clients are built on first use so unused channels need no config.
+
+    def __init__(self) -> None:
+        self._clients: Dict[str, object] = {}
+
+    def _client(self, channel: str):
+        if channel not in self._clients:
+            if channel == DEFAULT_SUBSCRIBER:
+                self._clients[channel] = get_notifier()
+            elif channel == "feishu":
+                self._clients[channel] = FeishuAppClient()
+            elif channel == "telegram":
+                self._clients[channel] = TelegramClient()
+            else:
+                raise RuntimeError(f"Unknown subscriber channel: {channel}")
+        return self._clients[channel]
+
+    def send_text(self, text: str):
+        return self._client(DEFAULT_SUBSCRIBER).send_text(text)
+
+    def send_to(self, subscriber: str, text: str):
+        if subscriber == DEFAULT_SUBSCRIBER:
+            return self.send_text(text)
+        channel, _, chat_id = subscriber.partition(":")
+        if channel == "feishu":
+            return self._client(channel).send_text_to_chat(chat_id, text)
+        return self._client(channel).send_text(chat_id, text)
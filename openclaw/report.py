@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import datetime as dt
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
 
 
 def _fmt_ts(ts: int | None) -> str:
@@ -68,3 +68,16 @@ def daily_summary_message(items: Dict[str, List[Dict]]) -> str:
             )
     return "\n".join(lines)
 
+
+def quarantine_message(items: List[Tuple[Dict, Dict]]) -> str:
+    # (up, health entry) pairs newly quarantined by up-watch
+    lines = ["UP 检查已暂停（接口返回永久错误）"]
+    for up, entry in items:
+        name = up.get("name") or up.get("mid")
+        reason = entry.get("reason") or entry.get("error") or ""
+        lines.append(
+            f"- {name} (MID: {up.get('mid')}): {entry.get('code')} {reason}\n"
+            f"  下次复查: {_fmt_ts(entry.get('next_retry'))}"
+        )
+    lines.append("确认已失效可执行 openclaw up remove <MID>；恢复检查: openclaw up health --reset <MID>")
+    return "\n".join(lines)
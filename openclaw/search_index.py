@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import heapq
+import html
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .bili import window_start
+from .config import SEARCH_INDEX_DAYS
+from .jsonlib import dumps, loads
+from .storage import DATA_DIR, file_lock
+
+SEARCH_DIR = os.path.join(DATA_DIR, "search")
+
+DOC_FIELDS = ("bvid", "title", "description", "author", "mid", "pubdate", "play", "url")
+# (field, term weight, index CJK unigrams)
+FIELD_WEIGHTS = (("title", 3, True), ("author", 2, True), ("description", 1, False))
+
+_TAG = re.compile(r"<[^>]+>")
+# runs of CJK ideographs / kana / hangul, or of latin letters and digits
+_TOKEN_RUN = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+|[0-9a-z]+"
+)
+
+
+def _is_cjk(run: str) -> bool:
+    return not ("0" <= run[0] <= "9" or "a" <= run[0] <= "z")
+
+
+def tokenize(text: str | None, unigrams: bool = False) -> List[str]:
+    # latin words whole, CJK runs as overlapping bigrams; unigrams too when
+    # asked (short fields, so one-character queries can match them)
+    if not text:
+        return []
+    tokens: List[str] = []
+    for run in _TOKEN_RUN.findall(text.lower()):
+        if len(run) > 1 and _is_cjk(run):
+            if unigrams:
+                tokens.extend(run)
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _clean(text: Any) -> str:
+    # search results carry <em class="keyword"> highlights and HTML entities
+    return html.unescape(_TAG.sub("", str(text or "")))
+
+
+def _doc_from_video(v: Any, now: int) -> Dict[str, Any]:
+    doc = {k: v.get(k) for k in DOC_FIELDS}
+    doc["title"] = _clean(doc["title"])
+    doc["description"] = _clean(doc["description"])[:200]
+    doc["mid"] = str(doc["mid"]) if doc["mid"] is not None else None
+    doc["fetched_at"] = now
+    return doc
+
+
+def _same_text(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return all(a.get(k) == b.get(k) for k in ("title", "description", "author"))
+
+
+class SearchIndex:
+    # Docs live in docs.jsonl, one line per bvid (a re-titled video appends a
+    # newer line that wins). Readers tail the file from their last offset, and
+    # the inverted index is built in memory on first search, then maintained
+    # incrementally: token -> sorted array of doc_id << 3 | field weight.
+
+    def __init__(self, path: str = SEARCH_DIR) -> None:
+        self.path = path
+        self.docs_path = os.path.join(path, "docs.jsonl")
+        self._lock = threading.RLock()
+        self._ids: Dict[str, int] = {}
+        self._docs: List[Dict[str, Any]] = []
+        self._postings: Dict[str, array] | None = None
+        self._offset = 0
+        self._inode: int | None = None
+        self._lines = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._ids)
+
+    def warm(self) -> None:
+        # build the in-memory index ahead of the first search
+        with self._lock:
+            self._sync()
+            self._ensure_postings()
+
+    def _reset(self) -> None:
+        self._ids = {}
+        self._docs = []
+        self._postings = None
+        self._offset = 0
+        self._lines = 0
+
+    def _sync(self) -> None:
+        # read lines appended since the last sync; start over if compacted
+        try:
+            st = os.stat(self.docs_path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            self._reset()
+            self._inode = st.st_ino
+        if st.st_size == self._offset:
+            return
+        with open(self.docs_path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            try:
+                self._put(loads(line))
+            except ValueError:
+                continue
+            self._lines += 1
+        self._offset += end
+
+    def _put(self, doc: Dict[str, Any]) -> None:
+        bvid = doc.get("bvid")
+        if not bvid:
+            return
+        doc_id = self._ids.get(bvid)
+        if doc_id is None:
+            doc_id = len(self._docs)
+            self._ids[bvid] = doc_id
+            self._docs.append(doc)
+        else:
+            if self._postings is not None:
+                self._unindex(doc_id)
+            self._docs[doc_id] = doc
+        if self._postings is not None:
+            self._index(doc_id)
+
+    def _terms(self, doc: Dict[str, Any]) -> Dict[str, int]:
+        terms: Dict[str, int] = {}
+        for field, weight, unigrams in FIELD_WEIGHTS:
+            for token in set(tokenize(doc.get(field), unigrams)):
+                terms[token] = terms.get(token, 0) + weight
+        return terms
+
+    def _index(self, doc_id: int) -> None:
+        postings = self._postings
+        for token, weight in self._terms(self._docs[doc_id]).items():
+            packed = doc_id << 3 | weight
+            posting = postings.get(token)
+            if posting is None:
+                postings[token] = array("I", (packed,))
+            elif posting[-1] < packed:
+                posting.append(packed)
+            else:
+                posting.insert(bisect_left(posting, packed), packed)
+
+    def _unindex(self, doc_id: int) -> None:
+        for token in self._terms(self._docs[doc_id]):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            i = bisect_left(posting, doc_id << 3)
+            if i < len(posting) and posting[i] >> 3 == doc_id:
+                del posting[i]
+            if not posting:
+                del self._postings[token]
+
+    def _ensure_postings(self) -> Dict[str, array]:
+        if self._postings is None:
+            self._postings = {}
+            for doc_id in range(len(self._docs)):
+                self._index(doc_id)
+        return self._postings
+
+    def add(self, videos: Iterable[Any], now: int | None = None) -> int:
+        # append docs for unseen bvids (or changed titles); returns how many
+        now = int(now or time.time())
+        with self._lock, file_lock(os.path.join(self.path, "docs.lock")):
+            self._sync()
+            fresh: Dict[str, Dict[str, Any]] = {}
+            for v in videos:
+                bvid = v.get("bvid")
+                if not bvid or bvid in fresh:
+                    continue
+                doc = _doc_from_video(v, now)
+                doc_id = self._ids.get(bvid)
+                if doc_id is not None and _same_text(self._docs[doc_id], doc):
+                    continue
+                fresh[bvid] = doc
+            if not fresh:
+                return 0
+            with open(self.docs_path, "ab") as f:
+                f.write(b"".join(dumps(d) + b"\n" for d in fresh.values()))
+            self._sync()
+            return len(fresh)
+
+    def search(
+        self, query: str, days: int | None = None, limit: int = 10, now: int | None = None
+    ) -> List[Dict[str, Any]]:
+        # AND over query tokens, tf-idf style score by field weight; newer wins ties
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        cutoff = window_start(days, now) if days else 0
+        with self._lock:
+            self._sync()
+            postings = self._ensure_postings()
+            lists = [postings.get(t) for t in tokens]
+            if not all(lists):
+                return []
+            lists.sort(key=len)
+            total = len(self._ids)
+            idf = [math.log(1 + total / len(p)) for p in lists]
+            rest = list(zip(lists[1:], idf[1:]))
+            scored: List[Tuple[float, int, int]] = []
+            # walk the rarest token's postings, binary-search the others
+            for packed in lists[0]:
+                doc_id = packed >> 3
+                score = (packed & 7) * idf[0]
+                for p, w in rest:
+                    i = bisect_left(p, doc_id << 3)
+                    if i == len(p) or p[i] >> 3 != doc_id:
+                        break
+                    score += (p[i] & 7) * w
+                else:
+                    pubdate = self._docs[doc_id].get("pubdate") or 0
+                    if pubdate > cutoff:
+                        scored.append((score, pubdate, doc_id))
+            top = heapq.nlargest(limit, scored)
+            return [dict(self._docs[doc_id], score=round(s, 3)) for s, _, doc_id in top]
+
+    def compact(self, retention_days: int = SEARCH_INDEX_DAYS, now: int | None = None) -> int:
+        # drop docs published before the retention window and superseded lines;
+        # rewrite only once a tenth of the file is dead
+        cutoff = int(now or time.time()) - retention_days * 86400
+        with self._lock, file_lock(os.path.join(self.path, "docs.lock")):
+            self._sync()
+            live = [d for d in self._docs if (d.get("pubdate") or 0) >= cutoff]
+            dropped = self._lines - len(live)
+            if dropped <= 0 or dropped * 10 < self._lines:
+                return 0
+            tmp = self.docs_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(b"".join(dumps(d) + b"\n" for d in live))
+            os.replace(tmp, self.docs_path)
+            self._reset()
+            self._inode = None
+            self._sync()
+            return dropped
+
+
+_index: SearchIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+        return _index
+
+
+def warm_search_index() -> None:
+    # long-running processes: pay the index build off the request path
+    threading.Thread(target=get_search_index().warm, daemon=True).start()
+
+
+def index_videos(videos: Iterable[Any], now: int | None = None) -> int:
+    return get_search_index().add(videos, now)
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Set
+
+from .config import SEEN_CAPACITY, SEEN_ERROR
+from .storage import DATA_DIR, DEFAULT_SUBSCRIBER, file_lock
+
+SEEN_DIR = os.path.join(DATA_DIR, "seen")
+
+# magic, hash count k, bit count m, capacity, keys added
+_HEADER = struct.Struct("<4sIQQQ")
+_MAGIC = b"OCBF"
+# sqlite caps bound parameters at 999 on older builds
+_LOOKUP_CHUNK = 500
+
+
+class BloomFilter:
+    # Bit array in a file, mapped with mmap: a membership check is k bit
+    # probes with nothing parsed or loaded, and every process shares the same
+    # pages. No false negatives; false positives at about the error rate
+    # it was sized for, until more than `capacity` keys are added.
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._map: mmap.mmap | None = None
+        self._open()
+
+    @classmethod
+    def create(cls, path: str, capacity: int, error: float) -> "BloomFilter":
+        capacity = max(1, int(capacity))
+        m = max(64, int(math.ceil(-capacity * math.log(error) / math.log(2) ** 2)))
+        k = max(1, int(round(m / capacity * math.log(2))))
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, k, m, capacity, 0))
+            f.truncate(_HEADER.size + (m + 7) // 8)
+        os.replace(tmp, path)
+        return cls(path)
+
+    def _open(self) -> None:
+        with open(self.path, "r+b") as f:
+            self._inode = os.fstat(f.fileno()).st_ino
+            self._map = mmap.mmap(f.fileno(), 0)
+        magic, self.k, self.m, self.capacity, _ = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise RuntimeError(f"Not a bloom filter file: {self.path}")
+
+    def reload_if_replaced(self) -> None:
+        # another process may have rebuilt (grown) the filter
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return
+        if inode != self._inode:
+            self.close()
+            self._open()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    @property
+    def count(self) -> int:
+        return _HEADER.unpack_from(self._map, 0)[4]
+
+    @count.setter
+    def count(self, value: int) -> None:
+        _HEADER.pack_into(self._map, 0, _MAGIC, self.k, self.m, self.capacity, value)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._map)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # double hashing over one 128-bit digest (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1
+        m = self.m
+        return ((h1 + i * h2) % m for i in range(self.k))
+
+    def __contains__(self, key: str) -> bool:
+        buf, base = self._map, _HEADER.size
+        for p in self._positions(key):
+            if not (buf[base + (p >> 3)] >> (p & 7)) & 1:
+                return False
+        return True
+
+    def add(self, key: str) -> None:
+        buf, base = self._map, _HEADER.size
+        for p in self._positions(key):
+            buf[base + (p >> 3)] |= 1 << (p & 7)
+
+    def error_rate(self) -> float:
+        # expected false-positive rate at the current fill
+        return (1 - math.exp(-self.k * self.count / self.m)) ** self.k
+
+
+def _key(subscriber: str, bvid: str) -> str:
+    return f"{subscriber}\0{bvid}"
+
+
+class SeenIndex:
+    # (subscriber, bvid) -> (first_seen, source) of videos already delivered
+    # to a chat, so neither another path (UP watch vs. keyword report) nor
+    # another day pushes them to that chat again; other chats still get them.
+    # seen.db (sqlite) is the record; seen.bloom answers "never delivered"
+    # without touching it, which is the common case. A bloom hit is confirmed
+    # in sqlite, so a false positive never drops a video.
+
+    def __init__(
+        self, path: str = SEEN_DIR, capacity: int = SEEN_CAPACITY, error: float = SEEN_ERROR
+    ) -> None:
+        self.path = path
+        self.error = error
+        self.bloom_path = os.path.join(path, "seen.bloom")
+        self.lock_path = os.path.join(path, "seen.lock")
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(
+            os.path.join(path, "seen.db"), timeout=30, check_same_thread=False
+        )
+        with self._lock, file_lock(self.lock_path):
+            self.db.execute("PRAGMA journal_mode=WAL")
+            migrated = self._migrate()
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                "subscriber TEXT NOT NULL, bvid TEXT NOT NULL, "
+                "first_seen INTEGER NOT NULL, source TEXT, "
+                "PRIMARY KEY (subscriber, bvid)) WITHOUT ROWID"
+            )
+            if migrated:
+                self.db.execute(
+                    "INSERT OR IGNORE INTO seen SELECT ?, bvid, first_seen, source FROM seen_v1",
+                    (DEFAULT_SUBSCRIBER,),
+                )
+                self.db.execute("DROP TABLE seen_v1")
+            self.db.commit()
+            if migrated or not os.path.exists(self.bloom_path):
+                # new index, or the filter was deleted: rebuild it from the record
+                self._rebuild(capacity).close()
+        self.bloom = BloomFilter(self.bloom_path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.bloom.reload_if_replaced()
+            return self.bloom.count
+
+    def _migrate(self) -> bool:
+        # caller holds the file lock. Indexes from before per-subscriber
+        # suppression keyed bvid alone; their rows become "default" deliveries.
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(seen)")]
+        if not columns or "subscriber" in columns:
+            return False
+        self.db.execute("ALTER TABLE seen RENAME TO seen_v1")
+        return True
+
+    def _rebuild(self, capacity: int) -> BloomFilter:
+        # caller holds the file lock
+        (rows,) = self.db.execute("SELECT COUNT(*) FROM seen").fetchone()
+        tmp = f"{self.bloom_path}.rebuild"
+        bloom = BloomFilter.create(tmp, max(capacity, rows * 2), self.error)
+        for subscriber, bvid in self.db.execute("SELECT subscriber, bvid FROM seen"):
+            bloom.add(_key(subscriber, bvid))
+        bloom.count = rows
+        bloom.close()
+        os.replace(tmp, self.bloom_path)
+        return BloomFilter(self.bloom_path)
+
+    def rebuild(self) -> None:
+        with self._lock, file_lock(self.lock_path):
+            self.bloom.close()
+            self.bloom = self._rebuild(self.bloom.capacity)
+
+    def _confirmed(self, subscriber: str, bvids: List[str]) -> Set[str]:
+        found: Set[str] = set()
+        for i in range(0, len(bvids), _LOOKUP_CHUNK):
+            chunk = bvids[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            rows = self.db.execute(
+                f"SELECT bvid FROM seen WHERE subscriber = ? AND bvid IN ({marks})",
+                [subscriber, *chunk],
+            )
+            found.update(bvid for (bvid,) in rows)
+        return found
+
+    def unseen(self, videos: Iterable[Any], subscriber: str = DEFAULT_SUBSCRIBER) -> List[Any]:
+        # the videos (dicts / Video records) never delivered to `subscriber`, in order
+        videos = list(videos)
+        with self._lock:
+            self.bloom.reload_if_replaced()
+            bvids = {v.get("bvid") for v in videos if v.get("bvid")}
+            maybe = sorted(b for b in bvids if _key(subscriber, b) in self.bloom)
+            seen = self._confirmed(subscriber, maybe) if maybe else set()
+        return [v for v in videos if v.get("bvid") not in seen]
+
+    def mark(
+        self,
+        videos: Iterable[Any],
+        source: str,
+        subscriber: str = DEFAULT_SUBSCRIBER,
+        now: int | None = None,
+    ) -> int:
+        # record videos delivered to `subscriber`; returns how many were new to the index
+        now = int(now or time.time())
+        bvids = list(dict.fromkeys(v.get("bvid") for v in videos if v.get("bvid")))
+        if not bvids:
+            return 0
+        with self._lock, file_lock(self.lock_path):
+            self.bloom.reload_if_replaced()
+            # bits first: a crash before the commit leaves a false positive
+            # (checked in sqlite), never a false negative
+            for bvid in bvids:
+                self.bloom.add(_key(subscriber, bvid))
+            before = self.db.total_changes
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO seen (subscriber, bvid, first_seen, source) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(subscriber, bvid, now, source) for bvid in bvids],
+                )
+            added = self.db.total_changes - before
+            self.bloom.count += added
+            if self.bloom.count > self.bloom.capacity:
+                self.bloom.close()
+                self.bloom = self._rebuild(self.bloom.capacity * 2)
+        return added
+
+    def get(self, bvid: str) -> List[Dict[str, Any]]:
+        # every chat the video was delivered to, oldest first
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT subscriber, first_seen, source FROM seen WHERE bvid = ? "
+                "ORDER BY first_seen",
+                (bvid,),
+            ).fetchall()
+        return [{"subscriber": r[0], "first_seen": r[1], "source": r[2]} for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self.bloom.reload_if_replaced()
+            return {
+                "deliveries": self.bloom.count,
+                "capacity": self.bloom.capacity,
+                "hashes": self.bloom.k,
+                "bloom_bytes": self.bloom.nbytes,
+                "false_positive_rate": round(self.bloom.error_rate(), 6),
+            }
+
+
+_seen: SeenIndex | None = None
+_seen_lock = threading.Lock()
+
+
+def get_seen_index() -> SeenIndex:
+    global _seen
+    with _seen_lock:
+        if _seen is None:
+            _seen = SeenIndex()
+        return _seen
@@ -1,14 +1,53 @@
 from __future__ import annotations
 
 import argparse
-import json
 import threading
+from collections import OrderedDict
 from http.server import BaseHTTPRequestHandler, HTTPServer
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 
 from .commands import parse_command
 from .config import DEBUG, FEISHU_BOT_NAME, FEISHU_ENCRYPT_KEY, FEISHU_VERIFICATION_TOKEN
 from .feishu_app import FeishuAppClient
+from .feishu_crypto import FeishuCipher
+from .jsonlib import dumps, loads
+from .ledger import load_runs, summarize
+from .search_index import warm_search_index
+
+
+_cipher: FeishuCipher | None = None
+_cipher_lock = threading.Lock()
+
+
+def _get_cipher() -> FeishuCipher | None:
+    # AES key derivation happens once per process, not per callback
+    global _cipher
+    if not FEISHU_ENCRYPT_KEY:
+        return None
+    if _cipher is None:
+        with _cipher_lock:
+            if _cipher is None:
+                _cipher = FeishuCipher(FEISHU_ENCRYPT_KEY)
+    return _cipher
+
+
+_seen_events: "OrderedDict[str, None]" = OrderedDict()
+_seen_lock = threading.Lock()
+
+
+def _is_duplicate(payload: dict) -> bool:
+    # Feishu redelivers events it thinks weren't acked; remember recent ids
+    header = payload.get("header") or {}
+    event_id = header.get("event_id") or payload.get("uuid")
+    if not event_id:
+        return False
+    with _seen_lock:
+        if event_id in _seen_events:
+            return True
+        _seen_events[event_id] = None
+        if len(_seen_events) > 10000:
+            _seen_events.popitem(last=False)
+    return False
 
 
 def _verify_token(payload: dict) -> bool:
@@ -50,7 +89,7 @@ def _handle_event(payload: dict) -> None:
         return
     content = message.get("content") or ""
     try:
-        content = json.loads(content)
+        content = loads(content)
         text = content.get("text", "")
     except Exception:
         text = ""
@@ -68,7 +107,7 @@ def _handle_event(payload: dict) -> None:
                 "text_preview": text[:80],
             },
         )
-    reply = parse_command(text, bot_name=FEISHU_BOT_NAME)
+    reply = parse_command(text, bot_name=FEISHU_BOT_NAME, chat_id=chat_id, channel="feishu")
     if not reply:
         if DEBUG and FEISHU_BOT_NAME:
             print("[event] filtered by bot name", {"bot_name": FEISHU_BOT_NAME})
@@ -79,9 +118,9 @@ def _handle_event(payload: dict) -> None:
 
 class FeishuHandler(BaseHTTPRequestHandler):
     def _send_json(self, data: dict, status: int = 200) -> None:
-        body = json.dumps(data).encode("utf-8")
+        body = dumps(data)
         self.send_response(status)
-        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", str(len(body)))
         self.end_headers()
         self.wfile.write(body)
@@ -90,6 +129,16 @@ class FeishuHandler(BaseHTTPRequestHandler):
         if self.path == "/health":
             self._send_json({"status": "ok"})
             return
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            query = parse_qs(url.query)
+            try:
+                last = int(query.get("last", ["50"])[0])
+            except ValueError:
+                last = 50
+            task = query.get("task", [None])[0]
+            self._send_json(summarize(load_runs(last=last, task=task)))
+            return
         self.send_response(404)
         self.end_headers()
 
@@ -101,11 +150,35 @@ class FeishuHandler(BaseHTTPRequestHandler):
         length = int(self.headers.get("Content-Length", "0"))
         raw = self.rfile.read(length) if length > 0 else b""
         try:
-            payload = json.loads(raw.decode("utf-8")) if raw else {}
+            payload = loads(raw) if raw else {}
         except Exception:
             self._send_json({"error": "invalid json"}, status=400)
             return
 
+        cipher = _get_cipher()
+        if cipher is not None:
+            if "encrypt" not in payload:
+                self._send_json({"error": "encrypted payload required"}, status=400)
+                return
+            # url_verification challenges arrive unsigned; events are always signed
+            signature = self.headers.get("X-Lark-Signature")
+            if signature and not cipher.verify(
+                self.headers.get("X-Lark-Request-Timestamp", ""),
+                self.headers.get("X-Lark-Request-Nonce", ""),
+                raw,
+                signature,
+            ):
+                self._send_json({"error": "invalid signature"}, status=401)
+                return
+            try:
+                payload = cipher.decrypt(payload["encrypt"])
+            except Exception:
+                self._send_json({"error": "decrypt failed"}, status=400)
+                return
+            if not signature and payload.get("type") != "url_verification":
+                self._send_json({"error": "missing signature"}, status=401)
+                return
+
         if payload.get("type") == "url_verification":
             if not _verify_token(payload):
                 self._send_json({"error": "invalid token"}, status=403)
@@ -117,6 +190,10 @@ class FeishuHandler(BaseHTTPRequestHandler):
             self._send_json({"error": "invalid token"}, status=403)
             return
 
+        if _is_duplicate(payload):
+            self._send_json({"status": "duplicate"})
+            return
+
         # async handle
         threading.Thread(target=_handle_event, args=(payload,), daemon=True).start()
         self._send_json({"status": "ok"})
@@ -128,6 +205,9 @@ def main() -> None:
     parser.add_argument("--port", type=int, default=8000)
     args = parser.parse_args()
 
+    # fail fast on a missing optional dependency instead of on the first event
+    _get_cipher()
+    warm_search_index()
     server = HTTPServer((args.host, args.port), FeishuHandler)
     print(f"Feishu callback server running on {args.host}:{args.port}")
     server.serve_forever()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from typing import Any, Dict
+
+from .config import SHARD_COUNT, SHARD_LEASE
+from .jsonlib import dump_file, load_file
+from .storage import DATA_DIR, file_lock
+
+LEASE_PATH = os.path.join(DATA_DIR, "shards.json")
+
+
+class LeaseLost(RuntimeError):
+    # another worker took the shard over; stop before touching its UPs
+    pass
+
+
+def shard_of(mid: str, count: int = SHARD_COUNT) -> int:
+    # stable across processes and hosts, unlike hash()
+    digest = hashlib.md5(str(mid).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+class ShardLeases:
+    # Lease table shared through the data dir:
+    #   shards: {shard: {"owner": worker, "expires": ts, "done_cycle": cycle}}
+    # A shard is claimable when it isn't done for this cycle and its lease is
+    # free or expired, so a dead worker's shards are picked up by the others.
+
+    def __init__(
+        self, path: str = LEASE_PATH, count: int = SHARD_COUNT, lease: float = SHARD_LEASE
+    ) -> None:
+        self.path = path
+        self.count = count
+        self.lease = lease
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {"count": self.count, "shards": {}}
+        data = load_file(self.path)
+        if data.get("count") != self.count:
+            # shard count changed: old assignments no longer mean anything
+            return {"count": self.count, "shards": {}}
+        return data
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        tmp = self.path + ".tmp"
+        dump_file(tmp, data)
+        os.replace(tmp, self.path)
+
+    def claim(self, worker: str, cycle: int) -> int | None:
+        now = time.time()
+        with file_lock(self.path + ".lock"):
+            data = self._load()
+            shards = data["shards"]
+            for i in range(self.count):
+                entry = shards.get(str(i)) or {}
+                if entry.get("done_cycle") == cycle:
+                    continue
+                owner = entry.get("owner")
+                if owner and owner != worker and entry.get("expires", 0) > now:
+                    continue
+                shards[str(i)] = {
+                    "owner": worker,
+                    "expires": now + self.lease,
+                    "done_cycle": entry.get("done_cycle"),
+                }
+                self._save(data)
+                return i
+        return None
+
+    def renew(self, worker: str, shard: int) -> bool:
+        with file_lock(self.path + ".lock"):
+            data = self._load()
+            entry = data["shards"].get(str(shard)) or {}
+            if entry.get("owner") != worker:
+                return False
+            entry["expires"] = time.time() + self.lease
+            self._save(data)
+            return True
+
+    def complete(self, worker: str, shard: int, cycle: int) -> None:
+        with file_lock(self.path + ".lock"):
+            data = self._load()
+            entry = data["shards"].get(str(shard)) or {}
+            if entry.get("owner") not in (None, worker):
+                return
+            data["shards"][str(shard)] = {"owner": None, "expires": 0, "done_cycle": cycle}
+            self._save(data)
+
+    def pending(self, cycle: int) -> bool:
+        # shards still leased by other workers in this cycle
+        with file_lock(self.path + ".lock"):
+            shards = self._load()["shards"]
+        return any(
+            (shards.get(str(i)) or {}).get("done_cycle") != cycle for i in range(self.count)
+        )
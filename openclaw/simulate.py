@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import heapq
+import math
+import random
+import re
+import time
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .config import (
+    CHECKPOINT_MAX_AGE,
+    CIRCUIT_COOLDOWN,
+    CIRCUIT_THRESHOLD,
+    MAX_RATE,
+    MIN_RATE,
+    REQUEST_BACKOFF,
+    REQUEST_RETRIES,
+)
+from .jsonlib import loads
+from .ledger import percentile
+from .http import ThrottledError
+from .tasks import UP_PAGE_SIZE, _throttled
+from .throttle import AimdPolicy, CircuitBreaker, CircuitOpenError
+
+# Offline replay of up-watch on a virtual clock. Each run is a fresh process
+# (cron): AIMD ramps from max_rate/2 and the circuit breaker starts closed,
+# while a throttled run's checkpoint carries over to the next run like
+# data/checkpoints/up-watch.json does. The error classification, backoff, AIMD
+# and breaker code is the real one; only time, the uploads and the Bilibili
+# risk control are modeled (no UP-specific API errors, so UP health never changes).
+
+Trace = Dict[str, List[float]]
+
+DEFAULT_POLICIES = ("1h:5", "1h:2", "15m:2", "5m:2")
+
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text: str) -> float:
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([smhd]?)", text.strip())
+    if not m:
+        raise RuntimeError(f"Bad duration: {text!r} (e.g. 300, 15m, 1h)")
+    return float(m.group(1)) * _UNITS[m.group(2)]
+
+
+class Policy:
+    # one way to run up-watch: a run every `interval` seconds, AIMD capped at `max_rate`
+
+    def __init__(self, interval: float, max_rate: float = MAX_RATE, name: str = "") -> None:
+        if interval <= 0 or max_rate <= 0:
+            raise RuntimeError("Policy interval and rate must be positive")
+        self.interval = interval
+        self.max_rate = max_rate
+        self.name = name or f"{interval:g}s:{max_rate:g}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Policy":
+        # "INTERVAL[:MAX_RATE]", e.g. "15m:2" or "3600"
+        interval, _, rate = spec.partition(":")
+        return cls(parse_duration(interval), float(rate) if rate else MAX_RATE, spec)
+
+    def aimd(self) -> AimdPolicy:
+        # up-watch checks UPs one at a time, so concurrency never binds
+        return AimdPolicy(1, self.max_rate, min(MIN_RATE, self.max_rate))
+
+
+class RiskControlServer:
+    # Modeled Bilibili rate limit for one identity: a token bucket of `burst`
+    # requests refilled at `rate`/s. A request on an empty bucket is refused
+    # (412) and trips risk control: everything is refused for `penalty` seconds.
+
+    def __init__(self, rate: float = 2.0, burst: float = 60, penalty: float = 600) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.penalty = penalty
+        self.tokens = float(burst)
+        self.at = 0.0
+        self.blocked_until = float("-inf")
+        self.blocks = 0
+
+    def refill(self, now: float) -> None:
+        if now > self.at:
+            self.tokens = min(self.burst, self.tokens + (now - self.at) * self.rate)
+            self.at = now
+
+    def request(self, now: float) -> bool:
+        self.refill(now)
+        if now < self.blocked_until:
+            return False
+        if self.tokens < 1:
+            self.blocked_until = now + self.penalty
+            self.blocks += 1
+            return False
+        self.tokens -= 1
+        return True
+
+
+class _CleanRun:
+    # A run that is never throttled is a pure function of its start: request
+    # k goes out offsets[k] after it, and the bucket holds
+    # min(T0, burst + m_k) - d_k tokens just before it, where T0 is the tokens
+    # at the start, d_k = k - rate * offsets[k] and m_k = min(d_1..d_k). The
+    # prefix tables below check and apply a whole run in O(1), so only UPs
+    # with an upload pending are touched.
+
+    def __init__(self, policy: Policy, server: RiskControlServer, latency: float, n: int) -> None:
+        aimd = policy.aimd()
+        self.offsets = [0.0]
+        for _ in range(1, n):
+            # the limiter paces at the rate before this success is counted
+            self.offsets.append(self.offsets[-1] + max(latency, aimd.interval))
+            aimd.on_success()
+        self.burst = server.burst
+        self.d: List[float] = []
+        self.m: List[float] = []
+        self.need = [float("-inf")]
+        self.headroom = [float("inf")]
+        low = float("inf")
+        for k, offset in enumerate(self.offsets):
+            d = k - server.rate * offset
+            if k:
+                low = min(low, d)
+            self.d.append(d)
+            self.m.append(low)
+            self.need.append(max(self.need[-1], 1 + d))
+            self.headroom.append(min(self.headroom[-1], self.burst + low - d))
+
+    def fits(self, n: int, tokens: float) -> bool:
+        return tokens >= self.need[n] and self.headroom[n] >= 1
+
+    def tokens_after(self, n: int, tokens: float) -> float:
+        k = n - 1
+        return min(tokens, self.burst + self.m[k]) - self.d[k] - 1
+
+
+def synthetic_trace(ups: int, days: float, per_week: float = 3.0, seed: int = 0) -> Trace:
+    # Poisson uploads per UP. Activity is long-tailed (lognormal, mean
+    # `per_week`), and uploads cluster around 19:00 Beijing time.
+    rng = random.Random(seed)
+    horizon = days * 86400
+    trace: Trace = {}
+    for n in range(ups):
+        rate = per_week * rng.lognormvariate(-0.5, 1.0) / (7 * 86400)
+        times: List[float] = []
+        t = 0.0
+        while rate > 0:
+            # thinning: candidates at twice the rate, kept with weight/2
+            t += rng.expovariate(2 * rate)
+            if t >= horizon:
+                break
+            hour = (t / 3600 + 8) % 24
+            if rng.random() < (1 + math.cos(2 * math.pi * (hour - 19) / 24)) / 2:
+                times.append(t)
+        trace[str(100000 + n)] = times
+    return trace
+
+
+def load_trace(path: str, mids: Iterable[str] | None = None) -> Tuple[Trace, float]:
+    # JSON lines with mid and pubdate (data/search/docs.jsonl works as is);
+    # returns the trace, shifted to start at midnight UTC, and its length in days
+    keep = {str(m) for m in mids} if mids is not None else None
+    seen = set()
+    uploads: Dict[str, List[float]] = {}
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                doc = loads(line)
+            except ValueError:
+                continue
+            mid, pubdate = doc.get("mid"), doc.get("pubdate")
+            if mid is None or not pubdate or (keep is not None and str(mid) not in keep):
+                continue
+            key = doc.get("bvid") or (mid, pubdate)
+            if key in seen:
+                continue
+            seen.add(key)
+            uploads.setdefault(str(mid), []).append(float(pubdate))
+    if not uploads:
+        raise RuntimeError(f"No uploads with mid and pubdate in {path}")
+    first = min(min(t) for t in uploads.values())
+    last = max(max(t) for t in uploads.values())
+    origin = first // 86400 * 86400
+    for mid in keep or ():
+        uploads.setdefault(mid, [])
+    trace = {mid: sorted(t - origin for t in times) for mid, times in uploads.items()}
+    return trace, max(1.0, math.ceil((last - origin) / 86400))
+
+
+def simulate(
+    policy: Policy,
+    trace: Trace,
+    days: float,
+    server: RiskControlServer,
+    latency: float = 0.2,
+    retries: int = REQUEST_RETRIES,
+    backoff: float = REQUEST_BACKOFF,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    ups = [{"mid": mid} for mid in sorted(trace)]
+    positions = {up["mid"]: k for k, up in enumerate(ups)}
+    clean = _CleanRun(policy, server, latency, len(ups))
+    horizon = days * 86400
+    # UPs stopped runs finished, least recently checked first, and when saved
+    checkpoint: Dict[str, None] = {}
+    checkpoint_at = float("-inf")
+    cursor = dict.fromkeys(trace, 0)
+    # next undetected upload per UP; entries go stale when the cursor moves
+    pending = [(times[0], mid) for mid, times in trace.items() if times]
+    heapq.heapify(pending)
+    delays: List[float] = []
+    counts = dict.fromkeys(
+        ("requests", "throttled", "circuit_opens", "runs_stopped", "ups_deferred", "missed"), 0
+    )
+    runs = throttled_runs = overlapped = 0
+
+    def detect(mid: str, checked_at: float) -> None:
+        # the UP's list shows its latest UP_PAGE_SIZE videos; older unseen ones are lost
+        times = trace[mid]
+        i = cursor[mid]
+        j = bisect_right(times, checked_at, i)
+        if j == i:
+            return
+        counts["missed"] += max(0, j - i - UP_PAGE_SIZE)
+        delays.extend(checked_at + latency - t for t in times[max(i, j - UP_PAGE_SIZE) : j])
+        cursor[mid] = j
+        if j < len(times):
+            heapq.heappush(pending, (times[j], mid))
+
+    def clean_run(start: float, due: List[Dict]) -> float:
+        n = len(due)
+        offsets = clean.offsets
+        end = start + offsets[n - 1]
+        server.tokens = clean.tokens_after(n, server.tokens)
+        server.at = end
+        counts["requests"] += n
+        where = positions if due is ups else {up["mid"]: k for k, up in enumerate(due)}
+        later = []
+        while pending and pending[0][0] <= end:
+            t, mid = heapq.heappop(pending)
+            k = where.get(mid)
+            if cursor[mid] >= len(trace[mid]) or trace[mid][cursor[mid]] != t:
+                continue
+            if k is None or t > start + offsets[k]:
+                later.append((t, mid))
+                continue
+            detect(mid, start + offsets[k])
+        for item in later:
+            heapq.heappush(pending, item)
+        checkpoint.clear()
+        return end + latency
+
+    def throttled_run(start: float, due: List[Dict]) -> float:
+        # request by request, as HttpClient.get_json + Limiter would do it;
+        # the run stops at the first throttled UP like _watch_ups does
+        nonlocal checkpoint_at
+        aimd = policy.aimd()
+        breaker = CircuitBreaker(CIRCUIT_THRESHOLD, CIRCUIT_COOLDOWN)
+        now = start
+        next_at = float("-inf")
+        for k, up in enumerate(due):
+            mid = up["mid"]
+            error: Exception | None = None
+            sent = now
+            for attempt in range(retries + 1):
+                if attempt:
+                    now += backoff * 2**attempt + 0.1  # + mean jitter
+                if not breaker.allow(now):
+                    error = CircuitOpenError("circuit open")
+                    break
+                now = max(now, next_at)
+                next_at = now + aimd.interval
+                counts["requests"] += 1
+                ok = server.request(now)
+                sent, now = now, now + latency
+                if ok:
+                    aimd.on_success()
+                    breaker.record(False, now)
+                    error = None
+                    break
+                counts["throttled"] += 1
+                opened_at = breaker.opened_at
+                aimd.on_throttle(now)
+                breaker.record(True, now)
+                if breaker.opened_at != opened_at:
+                    counts["circuit_opens"] += 1
+                error = ThrottledError("HTTP 412 from space_arc_search")
+            if error is None:
+                detect(mid, sent)
+                checkpoint.pop(mid, None)
+                checkpoint[mid] = None
+            elif _throttled(error):
+                counts["runs_stopped"] += 1
+                counts["ups_deferred"] += len(due) - k
+                checkpoint_at = now
+                return now
+        checkpoint.clear()
+        return now
+
+    due_at = 0.0
+    free_at = 0.0
+    while due_at < horizon:
+        start = due_at
+        due_at += policy.interval
+        if free_at > start:
+            # the previous run is still going: cron + flock -n skips this one
+            overlapped += 1
+            continue
+        if checkpoint and start - checkpoint_at <= CHECKPOINT_MAX_AGE * 3600:
+            # resumed run: UPs not reached first, then the finished ones,
+            # least recently checked first
+            due = [up for up in ups if up["mid"] not in checkpoint]
+            due += [{"mid": mid} for mid in checkpoint]
+        else:
+            checkpoint.clear()
+            due = ups
+        runs += 1
+        if due:
+            server.refill(start)
+            if server.blocked_until <= start and clean.fits(len(due), server.tokens):
+                free_at = clean_run(start, due)
+            else:
+                throttled_runs += 1
+                free_at = throttled_run(start, due)
+
+    uploads = sum(len(t) for t in trace.values())
+    detected = len(delays)
+    result: Dict[str, Any] = {
+        "policy": policy.name,
+        "days": days,
+        "ups": len(ups),
+        "uploads": uploads,
+        "detected": detected,
+        "missed": counts["missed"],
+        "undetected": uploads - detected - counts["missed"],
+    }
+    for p in (50, 90, 99):
+        value = percentile(delays, p)
+        result[f"delay_p{p}_min"] = None if value is None else round(value / 60, 1)
+    result.update(
+        {
+            "requests": counts["requests"],
+            "requests_per_day": round(counts["requests"] / days, 1),
+            "throttled": counts["throttled"],
+            "risk_control_blocks": server.blocks,
+            "circuit_opens": counts["circuit_opens"],
+            "runs_stopped": counts["runs_stopped"],
+            "ups_deferred": counts["ups_deferred"],
+            "runs": runs,
+            "throttled_runs": throttled_runs,
+            "runs_skipped": overlapped,
+            "wall_s": round(time.perf_counter() - started, 2),
+        }
+    )
+    return result
+
+
+def run_simulation(
+    policies: Iterable[Policy],
+    trace: Trace,
+    days: float,
+    server_rate: float = 2.0,
+    server_burst: float = 60,
+    penalty: float = 600,
+    latency: float = 0.2,
+) -> List[Dict[str, Any]]:
+    # every policy replays the same trace against its own fresh server
+    results = []
+    for policy in policies:
+        server = RiskControlServer(server_rate, server_burst, penalty)
+        results.append(simulate(policy, trace, days, server, latency))
+    return results
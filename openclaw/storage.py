@@ -1,9 +1,22 @@
-import json
+import atexit
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, TypeVar
 
-STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "state.json")
+from .config import DATA_DIR, STATE_FLUSH_DELAY
+from .jsonlib import dumps, load_file, loads
+
+try:
+    import fcntl
+except ImportError:  # Windows: locking degrades to a no-op
+    fcntl = None
+
+T = TypeVar("T")
+
+STATE_PATH = os.path.join(DATA_DIR, "state.json")
+KEYWORD_STORE_PATH = os.path.join(DATA_DIR, "keyword_store.json")
 
 DEFAULT_STATE: Dict[str, Any] = {
     "ups": [],
@@ -16,22 +29,122 @@ DEFAULT_STATE: Dict[str, Any] = {
 
 
 def _ensure_dir() -> None:
-    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    os.makedirs(DATA_DIR, exist_ok=True)
 
 
 def load_state() -> Dict[str, Any]:
     _ensure_dir()
     if not os.path.exists(STATE_PATH):
         save_state(DEFAULT_STATE)
-        return json.loads(json.dumps(DEFAULT_STATE))
-    with open(STATE_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+        return loads(dumps(DEFAULT_STATE))
+    return load_file(STATE_PATH)
 
 
 def save_state(state: Dict[str, Any]) -> None:
     _ensure_dir()
-    with open(STATE_PATH, "w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
+    # compact: machine-written; `openclaw up list` / `kw list` pretty-print it
+    tmp = f"{STATE_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(dumps(state))
+    os.replace(tmp, STATE_PATH)
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    # Advisory lock shared by processes on this host (and NFS hosts with lockd).
+    _ensure_dir()
+    with open(path, "a") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def update_state(fn: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    # Read-modify-write under the state lock so concurrent workers don't clobber each other.
+    with file_lock(STATE_PATH + ".lock"):
+        state = load_state()
+        fn(state)
+        save_state(state)
+    return state
+
+
+class StateStore:
+    # Keeps state in memory for long-running processes (server, telegram bot).
+    # Reloads only when the file changed on disk, and coalesces writes into one
+    # debounced atomic flush. Mutations since the last flush are replayed on top
+    # of the file if another process wrote it in between.
+
+    def __init__(self, flush_delay: float = STATE_FLUSH_DELAY) -> None:
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._state: Dict[str, Any] | None = None
+        self._stamp: Tuple[int, int] | None = None
+        self._pending: List[Callable[[Dict[str, Any]], Any]] = []
+        self._timer: threading.Timer | None = None
+
+    def _file_stamp(self) -> Tuple[int, int] | None:
+        try:
+            st = os.stat(STATE_PATH)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> None:
+        self._state = load_state()
+        self._stamp = self._file_stamp()
+
+    def _current(self) -> Dict[str, Any]:
+        if self._state is None or (not self._pending and self._file_stamp() != self._stamp):
+            self._load()
+        return self._state
+
+    def read(self, fn: Callable[[Dict[str, Any]], T]) -> T:
+        # fn runs under the lock; don't keep references to the state it sees
+        with self._lock:
+            return fn(self._current())
+
+    def update(self, fn: Callable[[Dict[str, Any]], T]) -> T:
+        with self._lock:
+            result = fn(self._current())
+            self._pending.append(fn)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            return result
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            with file_lock(STATE_PATH + ".lock"):
+                if self._file_stamp() != self._stamp:
+                    self._load()
+                    for fn in self._pending:
+                        fn(self._state)
+                save_state(self._state)
+                self._stamp = self._file_stamp()
+            self._pending = []
+
+
+_store: StateStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_state_store() -> StateStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore()
+            atexit.register(_store.flush)
+        return _store
 
 
 def add_up(state: Dict[str, Any], up: Dict[str, Any]) -> None:
@@ -44,9 +157,51 @@ def add_up(state: Dict[str, Any], up: Dict[str, Any]) -> None:
 def remove_up(state: Dict[str, Any], mid: str) -> bool:
     before = len(state["ups"])
     state["ups"] = [u for u in state["ups"] if str(u.get("mid")) != str(mid)]
+    state.get("subscriptions", {}).pop(str(mid), None)
     return len(state["ups"]) < before
 
 
+# subscriptions: mid -> subscriber ids, e.g. "default" (the configured
+# notifier), "feishu:<chat_id>", "telegram:<chat_id>". `ups` stays the set of
+# distinct UPs to fetch; a UP without an entry belongs to "default".
+DEFAULT_SUBSCRIBER = "default"
+
+
+def get_subscribers(state: Dict[str, Any], mid: str) -> List[str]:
+    subs = state.get("subscriptions", {}).get(str(mid))
+    return list(subs) if subs is not None else [DEFAULT_SUBSCRIBER]
+
+
+def get_subscribed_ups(state: Dict[str, Any], subscriber: str) -> List[Dict[str, Any]]:
+    return [u for u in state.get("ups", []) if subscriber in get_subscribers(state, u.get("mid"))]
+
+
+def subscribe(state: Dict[str, Any], up: Dict[str, Any], subscriber: str) -> bool:
+    mid = str(up.get("mid"))
+    subs = state.setdefault("subscriptions", {})
+    if mid not in subs:
+        watched = any(str(u.get("mid")) == mid for u in state["ups"])
+        subs[mid] = [DEFAULT_SUBSCRIBER] if watched else []
+    add_up(state, up)
+    if subscriber in subs[mid]:
+        return False
+    subs[mid].append(subscriber)
+    return True
+
+
+def unsubscribe(state: Dict[str, Any], mid: str, subscriber: str) -> bool:
+    # the UP stops being fetched once its last subscriber leaves
+    subs = get_subscribers(state, mid)
+    if subscriber not in subs or not any(str(u.get("mid")) == str(mid) for u in state["ups"]):
+        return False
+    remaining = [s for s in subs if s != subscriber]
+    if remaining:
+        state.setdefault("subscriptions", {})[str(mid)] = remaining
+    else:
+        remove_up(state, mid)
+    return True
+
+
 def add_keyword(state: Dict[str, Any], keyword: str) -> None:
     keyword = keyword.strip()
     if not keyword:
@@ -70,9 +225,121 @@ def set_last_seen_bvids(state: Dict[str, Any], mid: str, bvids: List[str]) -> No
     state.setdefault("last_seen", {}).setdefault("up_videos", {})[str(mid)] = bvids
 
 
+# undelivered: mid -> {subscriber: bvids its last notification failed to
+# deliver}; up-watch sends them again with the next check of the UP
+def get_undelivered_bvids(state: Dict[str, Any], mid: str) -> Dict[str, List[str]]:
+    return dict(state.get("last_seen", {}).get("undelivered", {}).get(str(mid), {}))
+
+
+def set_undelivered_bvids(state: Dict[str, Any], mid: str, pending: Dict[str, List[str]]) -> None:
+    undelivered = state.setdefault("last_seen", {}).setdefault("undelivered", {})
+    if pending:
+        undelivered[str(mid)] = pending
+    else:
+        undelivered.pop(str(mid), None)
+
+
+# up_health: mid -> {"failures", "error", "code", "reason", "since",
+# "last_failure", "next_retry", "quarantined"}; healthy UPs have no entry.
+def get_up_health(state: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return state.get("up_health", {})
+
+
+def set_up_health(state: Dict[str, Any], mid: str, entry: Dict[str, Any] | None) -> None:
+    health = state.setdefault("up_health", {})
+    if entry is None:
+        health.pop(str(mid), None)
+    else:
+        health[str(mid)] = entry
+
+
 def get_last_daily_date(state: Dict[str, Any]) -> str:
     return state.get("last_seen", {}).get("daily", {}).get("date")
 
 
 def set_last_daily_date(state: Dict[str, Any], date_str: str) -> None:
     state.setdefault("last_seen", {}).setdefault("daily", {})["date"] = date_str
+
+
+# Keyword candidate store, filled by `keyword-collect` runs during the day.
+# videos: bvid -> candidate fields + keywords it matched
+# followers: mid -> {"follower": int, "fetched_at": ts}
+# collected: keyword -> ts of last successful search
+
+
+def load_keyword_store() -> Dict[str, Any]:
+    _ensure_dir()
+    if not os.path.exists(KEYWORD_STORE_PATH):
+        return {"videos": {}, "followers": {}, "collected": {}}
+    return load_file(KEYWORD_STORE_PATH)
+
+
+def save_keyword_store(store: Dict[str, Any]) -> None:
+    _ensure_dir()
+    tmp = f"{KEYWORD_STORE_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(dumps(store))
+    os.replace(tmp, KEYWORD_STORE_PATH)
+
+
+def update_keyword_store(fn: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    # like update_state: overlapping keyword-collect/keyword-daily runs keep each other's merges
+    with file_lock(KEYWORD_STORE_PATH + ".lock"):
+        store = load_keyword_store()
+        fn(store)
+        save_keyword_store(store)
+    return store
+
+
+CANDIDATE_FIELDS = ("bvid", "mid", "pubdate", "play", "comment", "title", "author", "url")
+
+
+def merge_keyword_videos(
+    store: Dict[str, Any], keyword: str, videos: List[Dict[str, Any]], now: int
+) -> None:
+    stored = store.setdefault("videos", {})
+    for v in videos:
+        bvid = v.get("bvid")
+        if not bvid:
+            continue
+        item = stored.setdefault(bvid, {"keywords": [], "first_seen": now})
+        # `now` is when the results were fetched; older results never overwrite newer ones
+        if item.get("fetched_at", 0) <= now:
+            item.update({k: v.get(k) for k in CANDIDATE_FIELDS})
+            item["fetched_at"] = now
+        item["first_seen"] = min(item["first_seen"], now)
+        if keyword not in item["keywords"]:
+            item["keywords"].append(keyword)
+    collected = store.setdefault("collected", {})
+    collected[keyword] = max(collected.get(keyword, 0), now)
+
+
+def prune_keyword_store(store: Dict[str, Any], min_pubdate: int) -> None:
+    videos = store.get("videos", {})
+    for bvid in [b for b, v in videos.items() if (v.get("pubdate") or 0) < min_pubdate]:
+        del videos[bvid]
+    mids = {v.get("mid") for v in videos.values()}
+    followers = store.get("followers", {})
+    for mid in [m for m in followers if m not in mids]:
+        del followers[mid]
+
+
+def get_keyword_candidates(store: Dict[str, Any], keyword: str) -> List[Dict[str, Any]]:
+    return [v for v in store.get("videos", {}).values() if keyword in v.get("keywords", [])]
+
+
+def get_stale_follower_mids(
+    store: Dict[str, Any], mids: Iterable[str], max_age: float, now: int
+) -> List[str]:
+    followers = store.get("followers", {})
+    return [m for m in mids if now - (followers.get(m) or {}).get("fetched_at", 0) > max_age]
+
+
+def get_followers(store: Dict[str, Any]) -> Dict[str, int]:
+    return {m: f.get("follower", 0) for m, f in store.get("followers", {}).items()}
+
+
+def set_followers(store: Dict[str, Any], followers: Dict[str, int], now: int) -> None:
+    stored = store.setdefault("followers", {})
+    for mid, follower in followers.items():
+        stored[mid] = {"follower": follower, "fetched_at": now}
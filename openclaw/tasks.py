@@ -1,97 +1,571 @@
 from __future__ import annotations
 
 import datetime as dt
-from typing import Dict, List, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
 
-from .bili import BiliClient, within_days
-from .config import ENABLE_KEYWORD, FOLLOWER_MAX, KEYWORD_DAYS, KEYWORD_TOPK
-from .notifier import get_notifier
-from .report import daily_summary_message, up_watch_message
+from .bili import BiliApiError, BiliClient, filter_window, window_start
+from .checkpoint import Checkpoint
+from .config import (
+    CHECKPOINT_EVERY,
+    ENABLE_KEYWORD,
+    FOLLOWER_MAX,
+    KEYWORD_DAYS,
+    KEYWORD_FOLLOWER_TTL,
+    KEYWORD_ORDER,
+    KEYWORD_PAGES,
+    KEYWORD_RANK,
+    KEYWORD_STORE_MAX_AGE,
+    KEYWORD_TOPK,
+    KEYWORD_WORKERS,
+    SEARCH_INDEX_DAYS,
+    SEEN_DEDUP,
+    SHARD_CYCLE,
+    SHARD_LEASE,
+    STATS_RETENTION_DAYS,
+    TRENDING_HOURS,
+    UP_QUARANTINE_DAYS,
+    UP_RETRY_BASE,
+    UP_RETRY_MAX,
+)
+from .http import ThrottledError
+from .ledger import RunRecord
+from .models import Video
+from .notifier import SubscriberNotifier, get_notifier
+from .report import daily_summary_message, quarantine_message, up_watch_message
+from .search_index import get_search_index, index_videos
+from .seen import get_seen_index
+from .shard import LeaseLost, ShardLeases, shard_of
 from .storage import (
+    DEFAULT_SUBSCRIBER,
+    get_followers,
+    get_keyword_candidates,
     get_last_daily_date,
     get_last_seen_bvids,
+    get_stale_follower_mids,
+    get_subscribers,
+    get_undelivered_bvids,
+    get_up_health,
+    load_keyword_store,
     load_state,
-    save_state,
+    merge_keyword_videos,
+    prune_keyword_store,
+    set_followers,
     set_last_daily_date,
     set_last_seen_bvids,
+    set_undelivered_bvids,
+    set_up_health,
+    update_keyword_store,
+    update_state,
 )
+from .throttle import PRIORITY_COLLECT, PRIORITY_UP_WATCH, CircuitOpenError
+from .timeseries import StatSeries, pubdate_velocity
 from .utils import parse_count
 
 
+# up-watch reads the newest UP_PAGE_SIZE videos of each UP per run
+UP_PAGE_SIZE = 10
+
+
 def _today_str() -> str:
     return dt.datetime.now().strftime("%Y-%m-%d")
 
 
-def run_up_watch(notify: bool = True) -> Tuple[int, List[str]]:
-    state = load_state()
-    ups = state.get("ups", [])
-    client = BiliClient()
-    notifier = get_notifier()
+def _fan_out(notifier, subscribers: Iterable[str], text: str, errors: List[str]) -> List[str]:
+    # one failing chat must not block the others or fail the UP; returns the
+    # subscribers it reached
+    delivered: List[str] = []
+    for subscriber in subscribers:
+        try:
+            notifier.send_to(subscriber, text)
+            delivered.append(subscriber)
+        except Exception as exc:
+            errors.append(f"notify {subscriber}: {exc}")
+    return delivered
+
+
+def _check_up(
+    client: BiliClient,
+    notifier,
+    state: Dict,
+    up: Dict,
+    notify: bool,
+    errors: List[str],
+    keep_going: Callable[[], bool] | None = None,
+) -> Tuple[List[Dict], List[Dict]]:
+    # fetch one UP once, notify every subscriber on unseen videos, update
+    # last_seen; returns (videos, new)
+    mid = str(up.get("mid"))
+    videos = client.list_up_videos(mid, page=1, page_size=UP_PAGE_SIZE)
+    if keep_going is not None and not keep_going():
+        # the fetch may have stalled past the lease: another worker owns the UP now
+        raise LeaseLost(f"lease lost before notifying {mid}")
+    last_seen = set(get_last_seen_bvids(state, mid))
+    new_videos = [v for v in videos if v.get("bvid") not in last_seen]
+
+    if notify:
+        # each subscriber gets the new videos plus those its last notification
+        # failed to deliver; failures are kept for the next check
+        undelivered = get_undelivered_bvids(state, mid)
+        fresh = {v.get("bvid") for v in new_videos}
+        pending: Dict[str, List[str]] = {}
+        for subscriber in get_subscribers(state, mid):
+            retry = set(undelivered.get(subscriber, []))
+            items = [v for v in videos if v.get("bvid") in fresh or v.get("bvid") in retry]
+            if items and SEEN_DEDUP:
+                # already delivered to this chat by the keyword report, or
+                # before last_seen rolled over
+                items = get_seen_index().unseen(items, subscriber)
+            if not items:
+                continue
+            if not _fan_out(notifier, [subscriber], up_watch_message(up, items), errors):
+                pending[subscriber] = [v.get("bvid") for v in items if v.get("bvid")]
+            elif SEEN_DEDUP:
+                get_seen_index().mark(items, f"up:{mid}", subscriber)
+        set_undelivered_bvids(state, mid, pending)
+
+    # Update last seen to latest bvids (keep only 20)
+    latest_bvids = [v.get("bvid") for v in videos if v.get("bvid")]
+    set_last_seen_bvids(state, mid, latest_bvids[:20])
+    return videos, new_videos
+
+
+def _failure_entry(prev: Dict | None, exc: Exception, now: int) -> Dict:
+    # exponential backoff per UP; permanent API errors are quarantined
+    prev = prev or {}
+    failures = prev.get("failures", 0) + 1
+    entry = {
+        "failures": failures,
+        "error": type(exc).__name__,
+        "code": getattr(exc, "code", None),
+        "reason": getattr(exc, "reason", None) or str(exc)[:200],
+        "since": prev.get("since", now),
+        "last_failure": now,
+        "quarantined": bool(getattr(exc, "permanent", False)),
+    }
+    if entry["quarantined"]:
+        entry["next_retry"] = now + int(UP_QUARANTINE_DAYS * 86400)
+    else:
+        entry["next_retry"] = now + int(min(UP_RETRY_MAX, UP_RETRY_BASE * 2 ** (failures - 1)))
+    return entry
 
-    total_new = 0
-    errors: List[str] = []
 
+def _throttled(exc: Exception) -> bool:
+    # Bilibili is pushing back on this client; every UP after this one would
+    # fail the same way, and none of them is at fault
+    if isinstance(exc, (ThrottledError, CircuitOpenError)):
+        return True
+    return isinstance(exc, BiliApiError) and exc.throttled
+
+
+def _schedule_ups(ups: List[Dict], health: Dict[str, Dict], now: int) -> Tuple[List[Dict], int]:
+    # healthy UPs first so broken ones can't delay them; failing UPs only once
+    # their backoff has expired. Returns (UPs to check, skipped count).
+    healthy: List[Dict] = []
+    retry: List[Dict] = []
     for up in ups:
+        entry = health.get(str(up.get("mid")))
+        if entry is None:
+            healthy.append(up)
+        elif entry.get("next_retry", 0) <= now:
+            retry.append(up)
+    return healthy + retry, len(ups) - len(healthy) - len(retry)
+
+
+def _merge_results(
+    done: Dict[str, List[str]],
+    health: Dict[str, Dict | None],
+    undelivered: Dict[str, Dict[str, List[str]]],
+) -> None:
+    # write back only what this run changed, so concurrent follows/unfollows survive
+    def _apply(fresh: Dict) -> None:
+        for mid, bvids in done.items():
+            set_last_seen_bvids(fresh, mid, bvids)
+        watched = {str(u.get("mid")) for u in fresh.get("ups", [])}
+        for mid, entry in health.items():
+            set_up_health(fresh, mid, entry if mid in watched else None)
+        for mid, pending in undelivered.items():
+            set_undelivered_bvids(fresh, mid, pending if mid in watched else {})
+
+    update_state(_apply)
+
+
+def _watch_ups(
+    client: BiliClient,
+    notifier,
+    run: RunRecord,
+    state: Dict,
+    ups: List[Dict],
+    notify: bool,
+    errors: List[str],
+    keep_going: Callable[[], bool] | None = None,
+    checkpoint: Checkpoint | None = None,
+) -> Tuple[int, str | None]:
+    # check the due UPs, record stats/index/health; returns (new count, why the
+    # pass stopped early: "lease lost", "throttled" or None)
+    now = int(time.time())
+    health = get_up_health(state)
+    if checkpoint is not None:
+        # resumed run: UPs the earlier run didn't reach go first, then the
+        # ones it finished, least recently checked first. Nothing is dropped,
+        # so a UP is never left unchecked because an earlier run got to it.
+        rank = {mid: i for i, mid in enumerate(checkpoint.data.get("done", []))}
+        ups = sorted(ups, key=lambda u: rank.get(str(u.get("mid")), -1))
+    due, skipped = _schedule_ups(ups, health, now)
+    run.ups_skipped += skipped
+
+    total_new = 0
+    stopped: str | None = None
+    fetched: List[Dict] = []
+    done: Dict[str, List[str]] = {}
+    undelivered: Dict[str, Dict[str, List[str]]] = {}
+    changes: Dict[str, Dict | None] = {}
+    quarantined: List[Tuple[Dict, Dict]] = []
+    flushed_at = time.monotonic()
+
+    def _flush() -> None:
+        # persist what the pending UPs produced, so a crash loses at most
+        # CHECKPOINT_EVERY seconds of work and never re-sends a notification
+        _record_stats(fetched)
+        index_videos(fetched)
+        if quarantined and notify:
+            # each subscriber hears about the UPs it follows
+            by_subscriber: Dict[str, List[Tuple[Dict, Dict]]] = {}
+            for up, entry in quarantined:
+                for subscriber in get_subscribers(state, up.get("mid")):
+                    by_subscriber.setdefault(subscriber, []).append((up, entry))
+            for subscriber, items in by_subscriber.items():
+                _fan_out(notifier, [subscriber], quarantine_message(items), errors)
+        if done or changes:
+            _merge_results(done, changes, undelivered)
+        if checkpoint is not None:
+            # most recently checked last
+            finished = dict.fromkeys([*done, *changes])
+            kept = [m for m in checkpoint.data.get("done", []) if m not in finished]
+            checkpoint.data["done"] = kept + list(finished)
+            checkpoint.save(force=True)
+        fetched.clear()
+        done.clear()
+        undelivered.clear()
+        changes.clear()
+        quarantined.clear()
+
+    for up in due:
         mid = str(up.get("mid"))
+        run.ups_checked += 1
+        notified = False
+        failed = False
+        retried = notify and bool(get_undelivered_bvids(state, mid))
         try:
-            videos = client.list_up_videos(mid, page=1, page_size=10)
-            last_seen = set(get_last_seen_bvids(state, mid))
-            new_videos = [v for v in videos if v.get("bvid") not in last_seen]
-
-            if new_videos:
-                total_new += len(new_videos)
-                if notify:
-                    msg = up_watch_message(up, new_videos)
-                    notifier.send_text(msg)
-
-            # Update last seen to latest bvids (keep only 20)
-            latest_bvids = [v.get("bvid") for v in videos if v.get("bvid")]
-            set_last_seen_bvids(state, mid, latest_bvids[:20])
+            videos, new_videos = _check_up(
+                client, notifier, state, up, notify, errors, keep_going
+            )
+            fetched.extend(videos)
+            total_new += len(new_videos)
+            run.saw_new(new_videos)
+            done[mid] = get_last_seen_bvids(state, mid)
+            if notify:
+                undelivered[mid] = get_undelivered_bvids(state, mid)
+            notified = (bool(new_videos) and notify) or retried
+            if mid in health:
+                changes[mid] = None
+        except LeaseLost:
+            stopped = "lease lost"
+            break
         except Exception as exc:
             errors.append(f"{mid}: {exc}")
+            run.error(exc)
+            if _throttled(exc):
+                # health untouched; the checkpoint keeps this UP for the next run
+                stopped = "throttled"
+                break
+            failed = True
+            # timeouts, connection errors etc. leave health as it is: only an
+            # API answer about this UP counts against it
+            if isinstance(exc, BiliApiError) and exc.up_specific:
+                entry = _failure_entry(health.get(mid), exc, now)
+                changes[mid] = entry
+                if entry["quarantined"] and not health.get(mid, {}).get("quarantined"):
+                    quarantined.append((up, entry))
+        if notified or time.monotonic() - flushed_at >= CHECKPOINT_EVERY:
+            _flush()
+            flushed_at = time.monotonic()
+        # a checked UP renewed the lease in _check_up; a failed one renews here
+        if failed and keep_going is not None and not keep_going():
+            stopped = "lease lost"
+            break
+
+    _flush()
+    return total_new, stopped
+
 
-    save_state(state)
+def run_up_watch(notify: bool = True, resume: bool = True) -> Tuple[int, List[str]]:
+    state = load_state()
+    client = BiliClient(priority=PRIORITY_UP_WATCH)
+    run = RunRecord("up-watch")
+    with run:
+        notifier = run.track(SubscriberNotifier())
+        checkpoint = Checkpoint("up-watch", resume=resume)
+
+        errors: List[str] = []
+        ups = state.get("ups", [])
+        total_new, stopped = _watch_ups(
+            client, notifier, run, state, ups, notify, errors, checkpoint=checkpoint
+        )
+        get_search_index().compact(SEARCH_INDEX_DAYS)
+        if stopped is None:
+            checkpoint.clear()
+        else:
+            # throttled: the next run starts with the UPs this one didn't reach
+            errors.append("up-watch: throttled, stopped early; the next run resumes")
+    return total_new, errors
+
+
+def run_up_watch_sharded(
+    worker: str, cycle: int | None = None, notify: bool = True
+) -> Tuple[int, List[str]]:
+    # Claim shards until every shard is done for this cycle. Shards held by
+    # other workers are waited on so a dead worker's lease expires and is taken over.
+    if cycle is None:
+        cycle = int(time.time() // SHARD_CYCLE)
+    leases = ShardLeases()
+    client = BiliClient(priority=PRIORITY_UP_WATCH)
+    run = RunRecord("up-watch-sharded")
+    with run:
+        notifier = run.track(SubscriberNotifier())
+
+        total_new = 0
+        errors: List[str] = []
+
+        while True:
+            shard = leases.claim(worker, cycle)
+            if shard is None:
+                if not leases.pending(cycle):
+                    break
+                time.sleep(min(5.0, SHARD_LEASE / 4))
+                continue
+
+            state = load_state()
+            ups = [u for u in state.get("ups", []) if shard_of(str(u.get("mid"))) == shard]
+            count, stopped = _watch_ups(
+                client,
+                notifier,
+                run,
+                state,
+                ups,
+                notify,
+                errors,
+                keep_going=lambda: leases.renew(worker, shard),
+            )
+            total_new += count
+            if stopped == "lease lost":
+                errors.append(f"shard {shard}: lease lost")
+            else:
+                # a throttled shard is done for this cycle too; its UPs are
+                # checked next cycle rather than hammered again now
+                leases.complete(worker, shard, cycle)
     return total_new, errors
 
 
-def _filter_keyword_results(keyword: str) -> List[Dict]:
-    client = BiliClient()
-    items = []
-    page = 1
-    while page <= 3 and len(items) < 50:
-        results = client.search_videos_by_keyword(keyword, page=page, page_size=20)
+def _iter_keyword_results(client: BiliClient, keyword: str) -> Iterator[Dict]:
+    # yield in-window videos page by page; with pubdate order, stop paging at
+    # the first video older than the window.
+    now = int(time.time())
+    begin = window_start(KEYWORD_DAYS, now)
+    count = 0
+    for page in range(1, KEYWORD_PAGES + 1):
+        results = client.search_videos_by_keyword(
+            keyword,
+            page=page,
+            page_size=20,
+            order=KEYWORD_ORDER or None,
+            pubtime_begin=begin,
+            pubtime_end=now,
+        )
         if not results:
-            break
-        items.extend(results)
-        page += 1
+            return
+        for v in results:
+            if (v.pubdate or 0) > begin:
+                yield v
+            elif KEYWORD_ORDER == "pubdate":
+                return
+        count += len(results)
+        if len(results) < 20 or (count >= 50 and KEYWORD_ORDER != "pubdate"):
+            return
 
-    # filter by last 7 days (approx by pubdate)
-    items = [v for v in items if within_days(v.get("pubdate"), KEYWORD_DAYS)]
 
-    # enrich follower count and filter < 10k
-    filtered: List[Dict] = []
-    for v in items:
-        mid = v.get("mid")
-        if not mid:
+def _search_keyword(client: BiliClient, keyword: str) -> List[Dict]:
+    return list(_iter_keyword_results(client, keyword))
+
+
+def _search_keywords(
+    client: BiliClient,
+    keywords: List[str],
+    errors: List[str],
+    run: RunRecord | None = None,
+    checkpoint: Checkpoint | None = None,
+) -> Dict[str, List[Dict]]:
+    # stage 1: search all keywords concurrently, then dedup videos by bvid.
+    # Keywords an interrupted run already searched come from the checkpoint.
+    saved = checkpoint.data.setdefault("found", {}) if checkpoint is not None else {}
+    # when each saved keyword was searched: a resumed run's results keep their age
+    fetched_at = checkpoint.data.setdefault("fetched_at", {}) if checkpoint is not None else {}
+    found: Dict[str, List[Dict]] = {
+        kw: [Video(**{k: v.get(k) for k in Video.__slots__}) for v in saved[kw]]
+        for kw in keywords
+        if kw in saved
+    }
+    with ThreadPoolExecutor(max_workers=KEYWORD_WORKERS) as pool:
+        futures = {
+            pool.submit(_search_keyword, client, kw): kw for kw in keywords if kw not in found
+        }
+        for fut in as_completed(futures):
+            kw = futures[fut]
+            try:
+                found[kw] = fut.result()
+            except Exception as exc:
+                errors.append(f"{kw}: {exc}")
+                if run is not None:
+                    run.error(exc)
+                continue
+            if checkpoint is not None:
+                saved[kw] = [v.to_dict() for v in found[kw]]
+                fetched_at[kw] = int(time.time())
+                checkpoint.save()
+    if checkpoint is not None:
+        checkpoint.save(force=True)
+
+    videos: Dict[str, Dict] = {}
+    results: Dict[str, List[Dict]] = {}
+    for kw in keywords:
+        if kw not in found:
             continue
+        vids = []
+        seen: Set[str] = set()
+        for v in found[kw]:
+            bvid = v.get("bvid")
+            if not bvid or bvid in seen:
+                continue
+            seen.add(bvid)
+            vids.append(videos.setdefault(bvid, v))
+        results[kw] = vids
+    return results
+
+
+def _fetch_followers(
+    client: BiliClient, mids: Set[str], checkpoint: Checkpoint | None = None
+) -> Dict[str, int]:
+    # stage 2: one follower lookup per distinct UP across all keywords
+    saved = checkpoint.data.setdefault("followers", {}) if checkpoint is not None else {}
+
+    def _follower(mid: str) -> int | None:
         try:
-            stat = client.get_relation_stat(mid)
-            follower = stat.get("follower", 0)
+            return client.get_relation_stat(mid).get("follower", 0)
         except Exception:
-            follower = 0
-        v["follower"] = follower
-        if follower < FOLLOWER_MAX:
+            # left out of the result: not cached or checkpointed, retried next run
+            return None
+
+    ordered = sorted(m for m in mids if m not in saved)
+    followers = {m: saved[m] for m in mids if m in saved}
+    with ThreadPoolExecutor(max_workers=KEYWORD_WORKERS) as pool:
+        for mid, count in zip(ordered, pool.map(_follower, ordered)):
+            if count is None:
+                continue
+            followers[mid] = count
+            if checkpoint is not None:
+                saved[mid] = count
+                checkpoint.save()
+    if checkpoint is not None:
+        checkpoint.save(force=True)
+    return followers
+
+
+def _rank_keyword_results(
+    videos: List[Dict], followers: Dict[str, int], scores: Dict[str, float] | None = None
+) -> List[Dict]:
+    # stage 3: filter < FOLLOWER_MAX and sort by play (or velocity score) desc
+    filtered: List[Dict] = []
+    for v in videos:
+        mid = v.get("mid")
+        if not mid or followers.get(mid) is None:
+            # unknown follower count (lookup failed): can't tell it's a small UP
+            continue
+        v["follower"] = followers[mid]
+        if v["follower"] < FOLLOWER_MAX:
             filtered.append(v)
 
-    # sort by play desc
     def _play(x: Dict) -> int:
         return parse_count(x.get("play", 0))
 
-    filtered.sort(key=_play, reverse=True)
+    def _velocity(x: Dict) -> Tuple[bool, float]:
+        # window growth and lifetime plays/age aren't comparable: videos with a
+        # measured window rate rank first, first-seen ones after them
+        score = scores.get(x.get("bvid"))
+        return (False, pubdate_velocity(x)) if score is None else (True, score)
+
+    filtered.sort(key=_play if scores is None else _velocity, reverse=True)
     return filtered[:KEYWORD_TOPK]
 
 
-def run_keyword_daily(force: bool = False, notify: bool = True) -> Tuple[int, List[str]]:
+def _record_stats(videos: Iterable[Dict]) -> StatSeries:
+    series = StatSeries()
+    series.record_videos(videos)
+    series.flush()
+    return series
+
+
+def _refresh_followers(client: BiliClient, store: Dict, mids: Set[str], now: int) -> Dict:
+    # lookups run outside the store lock; returns the store as written back
+    stale = get_stale_follower_mids(store, mids, KEYWORD_FOLLOWER_TTL * 3600, now)
+    if not stale:
+        return store
+    fetched = _fetch_followers(client, set(stale))
+    return update_keyword_store(lambda fresh: set_followers(fresh, fetched, now))
+
+
+def _store_is_fresh(store: Dict, keywords: List[str], now: int) -> bool:
+    collected = store.get("collected", {})
+    max_age = KEYWORD_STORE_MAX_AGE * 3600
+    return all(now - collected.get(kw, 0) <= max_age for kw in keywords)
+
+
+def run_keyword_collect(resume: bool = True) -> Tuple[int, List[str]]:
+    state = load_state()
+    keywords = state.get("keywords", [])
+    if not ENABLE_KEYWORD or not keywords:
+        return 0, []
+    client = BiliClient(priority=PRIORITY_COLLECT)
+    run = RunRecord("keyword-collect")
+    with run:
+        errors: List[str] = []
+        now = int(time.time())
+
+        checkpoint = Checkpoint("keyword-collect", resume=resume)
+        found = _search_keywords(client, keywords, errors, run, checkpoint)
+        unique = list({v["bvid"]: v for vids in found.values() for v in vids}.values())
+        _record_stats(unique)
+        index_videos(unique, now)
+
+        fetched_at = checkpoint.data.get("fetched_at", {})
+
+        def _merge(store: Dict) -> None:
+            # results resumed from a killed run are as old as that run's search
+            for kw, vids in found.items():
+                merge_keyword_videos(store, kw, vids, fetched_at.get(kw, now))
+            prune_keyword_store(store, window_start(KEYWORD_DAYS, now))
+
+        store = update_keyword_store(_merge)
+        mids = {v.get("mid") for vids in found.values() for v in vids if v.get("mid")}
+        _refresh_followers(client, store, mids, now)
+        checkpoint.clear()
+        run.items = sum(len(v) for v in found.values())
+    return run.items, errors
+
+
+def run_keyword_daily(
+    force: bool = False, notify: bool = True, resume: bool = True
+) -> Tuple[int, List[str]]:
     state = load_state()
     if not ENABLE_KEYWORD:
         return 0, []
@@ -102,38 +576,78 @@ def run_keyword_daily(force: bool = False, notify: bool = True) -> Tuple[int, Li
     keywords = state.get("keywords", [])
     if not keywords:
         return 0, []
-    notifier = get_notifier()
-    errors: List[str] = []
+    client = BiliClient(priority=PRIORITY_COLLECT)
+    run = RunRecord("keyword-daily")
+    with run:
+        notifier = run.track(get_notifier())
+        errors: List[str] = []
+        now = int(time.time())
+        checkpoint = Checkpoint("keyword-daily", key=today, resume=resume)
 
-    results: Dict[str, List[Dict]] = {}
-    total_items = 0
-    for kw in keywords:
-        try:
-            vids = _filter_keyword_results(kw)
+        store = load_keyword_store()
+        store_fresh = _store_is_fresh(store, keywords, now)
+        if store_fresh:
+            # build from what keyword-collect gathered; only stale followers hit the API
+            found = {}
+            for kw in keywords:
+                found[kw] = filter_window(get_keyword_candidates(store, kw), KEYWORD_DAYS, now)
+            mids = {v.get("mid") for vids in found.values() for v in vids if v.get("mid")}
+            followers = get_followers(_refresh_followers(client, store, mids, now))
+        else:
+            found = _search_keywords(client, keywords, errors, run, checkpoint)
+            mids = {v.get("mid") for vids in found.values() for v in vids if v.get("mid")}
+            followers = _fetch_followers(client, mids, checkpoint)
+
+        candidates = list({v["bvid"]: v for vids in found.values() for v in vids}.values())
+        series = StatSeries() if store_fresh else _record_stats(candidates)
+        if not store_fresh:
+            index_videos(candidates, now)
+        scores = None
+        if KEYWORD_RANK == "velocity":
+            scores = series.velocity(candidates, TRENDING_HOURS, now)
+        series.compact(STATS_RETENTION_DAYS, now)
+        get_search_index().compact(SEARCH_INDEX_DAYS, now)
+
+        results: Dict[str, List[Dict]] = {}
+        total_items = 0
+        for kw in keywords:
+            if kw not in found:
+                continue
+            # videos this chat got on an earlier day or from up-watch don't take a slot
+            fresh = found[kw]
+            if SEEN_DEDUP:
+                fresh = get_seen_index().unseen(fresh, DEFAULT_SUBSCRIBER)
+            vids = _rank_keyword_results(fresh, followers, scores)
             results[kw] = vids
             total_items += len(vids)
-        except Exception as exc:
-            errors.append(f"{kw}: {exc}")
 
-    if notify:
-        msg = daily_summary_message(results)
-        notifier.send_text(msg)
+        # a run that died after sending must not send the summary twice
+        if notify and not checkpoint.data.get("notified"):
+            msg = daily_summary_message(results)
+            # raises on a failed send, so only delivered videos are marked
+            notifier.send_text(msg)
+            if SEEN_DEDUP:
+                for kw, vids in results.items():
+                    get_seen_index().mark(vids, f"keyword:{kw}", DEFAULT_SUBSCRIBER, now)
+            checkpoint.data["notified"] = True
+            checkpoint.save(force=True)
 
-    set_last_daily_date(state, today)
-    save_state(state)
+        update_state(lambda fresh: set_last_daily_date(fresh, today))
+        checkpoint.clear()
+        run.items = total_items
     return total_items, errors
 
 
-def run_all() -> Tuple[Dict[str, int], List[str]]:
+def run_all(resume: bool = True) -> Tuple[Dict[str, int], List[str]]:
     counts = {}
     errors: List[str] = []
 
-    c1, e1 = run_up_watch(notify=True)
+    c1, e1 = run_up_watch(notify=True, resume=resume)
     counts["up_watch_new"] = c1
     errors.extend(e1)
 
     if ENABLE_KEYWORD:
-        c2, e2 = run_keyword_daily(force=False, notify=True)
+        c2, e2 = run_keyword_daily(force=False, notify=True, resume=resume)
         counts["keyword_items"] = c2
         errors.extend(e2)
 
@@ -5,6 +5,7 @@ from typing import Dict, Tuple
 
 from .commands import parse_command
 from .config import DEBUG, TG_BOT_NAME
+from .search_index import warm_search_index
 from .telegram import TelegramClient, poll_interval
 
 
@@ -22,6 +23,7 @@ def main() -> None:
     client = TelegramClient()
     offset: int | None = None
     interval = poll_interval()
+    warm_search_index()
 
     while True:
         try:
@@ -35,7 +37,9 @@ def main() -> None:
                     continue
                 if DEBUG:
                     print("[tg] received", {"chat_id": chat_id, "text_preview": text[:80]})
-                reply = parse_command(text, bot_name=TG_BOT_NAME or None)
+                reply = parse_command(
+                    text, bot_name=TG_BOT_NAME or None, chat_id=chat_id, channel="telegram"
+                )
                 if reply:
                     client.send_text(chat_id, reply)
         except Exception as exc:
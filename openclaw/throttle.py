@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from .config import (
+    CIRCUIT_COOLDOWN,
+    CIRCUIT_THRESHOLD,
+    MAX_CONCURRENCY,
+    MAX_RATE,
+    MIN_RATE,
+)
+from .identity import get_identity_pool
+
+# Priority classes for Bilibili traffic; lower runs first.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_UP_WATCH = 1
+PRIORITY_COLLECT = 2
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class AimdPolicy:
+    # Additive-increase / multiplicative-decrease of concurrency and request
+    # rate. Decreases are applied at most once per `cut_every` seconds so a
+    # burst of throttled in-flight requests counts as one signal.
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_rate: float = MAX_RATE,
+        min_rate: float = MIN_RATE,
+        cut_every: float = 1.0,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.cut_every = cut_every
+        self.limit = float(self.max_concurrency)
+        self.rate = max(self.min_rate, max_rate / 2)
+        self._last_cut = float("-inf")
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate
+
+    def on_success(self) -> None:
+        self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 50)
+
+    def on_throttle(self, now: float) -> None:
+        if now - self._last_cut < self.cut_every:
+            return
+        self._last_cut = now
+        self.limit = max(1.0, self.limit / 2)
+        self.rate = max(self.min_rate, self.rate / 2)
+
+
+class CircuitBreaker:
+    # closed -> open after `threshold` consecutive throttles; open fails fast
+    # for `cooldown` seconds, then lets one probe through (half-open). A good
+    # probe closes the circuit, a throttled one reopens it.
+
+    def __init__(
+        self, threshold: int = CIRCUIT_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.probing else "open"
+
+    def allow(self, now: float) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.probing or now - self.opened_at < self.cooldown:
+            return False
+        self.probing = True
+        return True
+
+    def record(self, throttled: bool, now: float) -> None:
+        if not throttled:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+            return
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            self.opened_at = now
+        self.probing = False
+
+
+class Limiter:
+    # Shared by every BiliClient in the process: paces request starts at the
+    # AIMD rate, caps in-flight requests, and keeps one breaker per endpoint.
+    # Waiters are served by priority class, then FIFO, so a chat command
+    # queued behind a crawl gets the next free slot.
+
+    def __init__(
+        self, policy: AimdPolicy | None = None, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.policy = policy or AimdPolicy()
+        self.clock = clock
+        self.inflight = 0
+        self._next_at = 0.0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self._breakers:
+            self._breakers[endpoint] = CircuitBreaker()
+        return self._breakers[endpoint]
+
+    def acquire(self, endpoint: str, priority: int = PRIORITY_INTERACTIVE) -> None:
+        with self._cond:
+            if not self.breaker(endpoint).allow(self.clock()):
+                raise CircuitOpenError(f"circuit open for {endpoint}")
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = self.clock()
+                    wait = self._next_at - now
+                    head = self._waiters[0] == ticket
+                    if head and self.inflight < int(self.policy.limit) and wait <= 0:
+                        break
+                    # only the head waits on the pacing clock; others wait for a notify
+                    self._cond.wait(timeout=wait if head and wait > 0 else None)
+            except BaseException:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiters)
+            self.inflight += 1
+            self._next_at = max(now, self._next_at) + self.policy.interval
+            self._cond.notify_all()
+
+    def release(self, endpoint: str, throttled: bool = False, ok: bool = True) -> None:
+        with self._cond:
+            self.inflight -= 1
+            now = self.clock()
+            if throttled:
+                self.policy.on_throttle(now)
+                self.breaker(endpoint).record(True, now)
+            elif ok:
+                self.policy.on_success()
+                self.breaker(endpoint).record(False, now)
+            else:
+                # network error etc.: free a half-open probe slot without judging the endpoint
+                self.breaker(endpoint).probing = False
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                "limit": int(self.policy.limit),
+                "rate": round(self.policy.rate, 3),
+                "inflight": self.inflight,
+                "waiting": len(self._waiters),
+                "circuits": {k: b.state for k, b in self._breakers.items() if b.state != "closed"},
+            }
+
+
+_limiter: Limiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> Limiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            # with several identities the shared budget is their sum; each
+            # identity still paces itself in IdentityPool
+            pool = get_identity_pool()
+            policy = AimdPolicy(MAX_CONCURRENCY * len(pool), pool.total_rate or MAX_RATE)
+            _limiter = Limiter(policy)
+        return _limiter
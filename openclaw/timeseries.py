@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import os
+import time
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+from .storage import DATA_DIR, file_lock
+from .utils import parse_count
+
+STATS_DIR = os.path.join(DATA_DIR, "stats")
+
+# One file per column, appended in lockstep; a sample is 20 bytes on disk.
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("ts", "I"),
+    ("key", "I"),
+    ("play", "q"),
+    ("comment", "i"),
+)
+
+
+class StatSeries:
+    # Append-only per-video play/comment samples stored column-wise. Only the
+    # bvid table is read on open; columns load when a query needs them.
+
+    def __init__(self, path: str = STATS_DIR) -> None:
+        self.path = path
+        self.keys: List[str] = []
+        self.key_index: Dict[str, int] = {}
+        # pending samples keep bvids; key ids are assigned under the lock on flush
+        # so several processes can append to the same series
+        self._pending_keys: List[str] = []
+        self._pending = {name: array(code) for name, code in COLUMNS}
+        self._columns: Dict[str, array] | None = None
+        os.makedirs(self.path, exist_ok=True)
+        self._load_keys()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _load_keys(self) -> None:
+        keys_path = os.path.join(self.path, "keys.txt")
+        self.keys = []
+        if os.path.exists(keys_path):
+            with open(keys_path, "r", encoding="utf-8") as f:
+                self.keys = [line.rstrip("\n") for line in f if line.strip()]
+        self.key_index = {k: i for i, k in enumerate(self.keys)}
+
+    def append(self, bvid: str, play: int, comment: int, ts: int | None = None) -> None:
+        self._pending_keys.append(bvid)
+        self._pending["ts"].append(int(ts or time.time()))
+        self._pending["play"].append(int(play))
+        self._pending["comment"].append(int(comment))
+        self._columns = None
+
+    def record_videos(self, videos: Iterable[dict], ts: int | None = None) -> None:
+        # accepts search/list results (play, comment) and get_video_detail (stat.view, stat.reply)
+        ts = int(ts or time.time())
+        for v in videos:
+            bvid = v.get("bvid")
+            if not bvid:
+                continue
+            stat = v.get("stat") or {}
+            play = parse_count(v.get("play") or stat.get("view"))
+            comment = parse_count(v.get("comment") or stat.get("reply"))
+            self.append(bvid, play, comment, ts)
+
+    def flush(self) -> None:
+        if not self._pending_keys:
+            return
+        with file_lock(os.path.join(self.path, "series.lock")):
+            self._load_keys()
+            new_keys: List[str] = []
+            for bvid in self._pending_keys:
+                idx = self.key_index.get(bvid)
+                if idx is None:
+                    idx = len(self.keys)
+                    self.keys.append(bvid)
+                    self.key_index[bvid] = idx
+                    new_keys.append(bvid)
+                self._pending["key"].append(idx)
+            if new_keys:
+                with open(os.path.join(self.path, "keys.txt"), "a", encoding="utf-8") as f:
+                    f.write("".join(f"{k}\n" for k in new_keys))
+            for name, code in COLUMNS:
+                with open(self._file(name), "ab") as f:
+                    self._pending[name].tofile(f)
+                self._pending[name] = array(code)
+        self._pending_keys = []
+
+    def columns(self) -> Dict[str, array]:
+        if self._columns is not None:
+            return self._columns
+        self.flush()
+        cols: Dict[str, array] = {}
+        for name, code in COLUMNS:
+            arr = array(code)
+            path = self._file(name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    arr.frombytes(f.read())
+            cols[name] = arr
+        # a crash between column appends leaves ragged tails; drop them
+        n = min(len(a) for a in cols.values())
+        for name in cols:
+            del cols[name][n:]
+        self._columns = cols
+        return cols
+
+    def __len__(self) -> int:
+        return len(self.columns()["ts"])
+
+    def compact(self, retention_days: int, now: int | None = None) -> int:
+        self.flush()
+        with file_lock(os.path.join(self.path, "series.lock")):
+            self._load_keys()
+            self._columns = None
+            return self._compact(int(now or time.time()) - retention_days * 86400)
+
+    def _compact(self, cutoff: int) -> int:
+        cols = self.columns()
+        keep = [i for i, ts in enumerate(cols["ts"]) if ts >= cutoff]
+        if len(keep) == len(cols["ts"]):
+            return 0
+        # renumber keys so dropped videos leave the bvid table too
+        remap: Dict[int, int] = {}
+        keys: List[str] = []
+        for i in keep:
+            old = cols["key"][i]
+            if old not in remap:
+                remap[old] = len(keys)
+                keys.append(self.keys[old])
+        new_cols = {name: array(code) for name, code in COLUMNS}
+        for i in keep:
+            new_cols["ts"].append(cols["ts"][i])
+            new_cols["key"].append(remap[cols["key"][i]])
+            new_cols["play"].append(cols["play"][i])
+            new_cols["comment"].append(cols["comment"][i])
+
+        for name, _ in COLUMNS:
+            tmp = self._file(name) + ".tmp"
+            with open(tmp, "wb") as f:
+                new_cols[name].tofile(f)
+            os.replace(tmp, self._file(name))
+        tmp = os.path.join(self.path, "keys.txt.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(f"{k}\n" for k in keys))
+        os.replace(tmp, os.path.join(self.path, "keys.txt"))
+
+        dropped = len(cols["ts"]) - len(keep)
+        self.keys = keys
+        self.key_index = {k: i for i, k in enumerate(keys)}
+        self._columns = new_cols
+        return dropped
+
+    def velocity(
+        self, videos: Iterable[dict], hours: float, now: int | None = None
+    ) -> Dict[str, float]:
+        # plays per hour between the oldest and newest samples in the window;
+        # videos with fewer than two samples there are left out
+        now = int(now or time.time())
+        start = now - int(hours * 3600)
+        wanted: Dict[int, dict] = {}
+        for v in videos:
+            idx = self.key_index.get(v.get("bvid"))
+            if idx is not None:
+                wanted[idx] = v
+
+        # one scan over the columns: first/last sample per wanted key
+        first: Dict[int, Tuple[int, int]] = {}
+        last: Dict[int, Tuple[int, int]] = {}
+        cols = self.columns()
+        for ts, key, play in zip(cols["ts"], cols["key"], cols["play"]):
+            if ts < start or key not in wanted:
+                continue
+            if key not in first or ts < first[key][0]:
+                first[key] = (ts, play)
+            if key not in last or ts >= last[key][0]:
+                last[key] = (ts, play)
+
+        scores: Dict[str, float] = {}
+        for key in wanted:
+            if key in last and last[key][0] > first[key][0]:
+                (t0, p0), (t1, p1) = first[key], last[key]
+                scores[self.keys[key]] = (p1 - p0) * 3600 / (t1 - t0)
+        return scores
+
+
+def pubdate_velocity(v: dict, now: int | None = None) -> float:
+    now = int(now or time.time())
+    age = max(3600, now - int(v.get("pubdate") or 0))
+    return parse_count(v.get("play")) * 3600 / age
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import ssl
+import threading
+from typing import Any, Dict, List, Tuple
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # optional: pip install "openclaw[http2]"
+    httpx = None
+
+from .config import HTTP_TRANSPORT, USER_AGENT
+
+# HttpClient talks to a transport: get()/post() returning a response with
+# status_code, content and raise_for_status(). requests.Response and
+# httpx.Response both fit, so retries and parsing stay in HttpClient.
+
+
+def default_headers(user_agent: str = "") -> Dict[str, str]:
+    return {
+        "User-Agent": user_agent or USER_AGENT,
+        "Referer": "https://www.bilibili.com/",
+        "Origin": "https://www.bilibili.com",
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    }
+
+
+def cookie_pairs(cookie: str = "", sessdata: str = "") -> List[Tuple[str, str]]:
+    pairs = [("SESSDATA", sessdata)] if sessdata else []
+    # Format: "key=value; key2=value2"
+    for part in cookie.split(";"):
+        part = part.strip()
+        if not part or "=" not in part:
+            continue
+        k, v = part.split("=", 1)
+        pairs.append((k.strip(), v.strip()))
+    return pairs
+
+
+class RequestsTransport:
+    # HTTP/1.1 keep-alive via requests; one connection per in-flight request.
+    name = "requests"
+
+    def __init__(
+        self,
+        headers: Dict[str, str],
+        cookies: List[Tuple[str, str]],
+        proxy: str = "",
+        verify: bool | str = True,
+    ) -> None:
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        for k, v in cookies:
+            self.session.cookies.set(k, v)
+        if proxy:
+            self.session.proxies = {"http": proxy, "https": proxy}
+        # per request: REQUESTS_CA_BUNDLE would override session.verify
+        self._extra: Dict[str, Any] = {} if verify is True else {"verify": verify}
+
+    def get(self, url: str, params: Dict[str, Any] | None, timeout: float):
+        return self.session.get(url, params=params, timeout=timeout, **self._extra)
+
+    def post(self, url: str, body: bytes, headers: Dict[str, str], timeout: float):
+        return self.session.post(url, data=body, headers=headers, timeout=timeout, **self._extra)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class Http2Transport:
+    # httpx with HTTP/2: concurrent requests to one origin share a connection
+    # as multiplexed streams. httpcore's sync HTTP/2 connection is not safe to
+    # share between threads, so an AsyncClient runs on one event-loop thread
+    # and callers block on their own request. Falls back to HTTP/1.1 if the
+    # server lacks h2.
+    name = "http2"
+
+    def __init__(
+        self,
+        headers: Dict[str, str],
+        cookies: List[Tuple[str, str]],
+        proxy: str = "",
+        verify: bool | str = True,
+    ) -> None:
+        if httpx is None:
+            raise RuntimeError(
+                'OPENCLAW_TRANSPORT=http2 needs httpx[http2] (pip install "openclaw[http2]")'
+            )
+        if isinstance(verify, str):
+            verify = ssl.create_default_context(cafile=verify)
+        try:
+            self.client = httpx.AsyncClient(
+                http2=True,
+                headers=headers,
+                cookies=dict(cookies),
+                proxy=proxy or None,
+                verify=verify,
+                follow_redirects=True,
+            )
+        except ImportError as exc:  # httpx without the h2 extra
+            raise RuntimeError(f'{exc} (pip install "openclaw[http2]")')
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="openclaw-http2", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def get(self, url: str, params: Dict[str, Any] | None, timeout: float):
+        return self._run(self.client.get(url, params=params, timeout=timeout))
+
+    def post(self, url: str, body: bytes, headers: Dict[str, str], timeout: float):
+        return self._run(self.client.post(url, content=body, headers=headers, timeout=timeout))
+
+    def close(self) -> None:
+        self._run(self.client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+TRANSPORTS = {"requests": RequestsTransport, "http2": Http2Transport}
+
+
+def build_transport(
+    cookie: str = "",
+    sessdata: str = "",
+    user_agent: str = "",
+    proxy: str = "",
+    kind: str = HTTP_TRANSPORT,
+    verify: bool | str = True,
+):
+    if kind not in TRANSPORTS:
+        raise RuntimeError(f"Unknown OPENCLAW_TRANSPORT: {kind!r} (use requests or http2)")
+    return TRANSPORTS[kind](default_headers(user_agent), cookie_pairs(cookie, sessdata), proxy, verify)
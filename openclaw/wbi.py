@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict
+from urllib.parse import quote, urlencode
+
+from .config import BILI_API_BASE
+from .http import HttpClient
+from .jsonlib import dump_file, load_file
+from .storage import DATA_DIR
+
+NAV_URL = f"{BILI_API_BASE}/x/web-interface/nav"
+KEYS_PATH = os.path.join(DATA_DIR, "wbi_keys.json")
+
+# codes returned for a missing/stale signature
+SIGN_ERROR_CODES = {-352, -403}
+
+MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52,
+]
+
+
+def mixin_key(img_key: str, sub_key: str) -> str:
+    orig = img_key + sub_key
+    return "".join(orig[i] for i in MIXIN_KEY_ENC_TAB)[:32]
+
+
+def sign_params(params: Dict[str, Any], key: str, ts: int | None = None) -> Dict[str, Any]:
+    signed = dict(params)
+    signed["wts"] = int(ts or time.time())
+    signed = {
+        k: "".join(ch for ch in str(v) if ch not in "!'()*") for k, v in sorted(signed.items())
+    }
+    # encodeURIComponent-style (%20 for spaces) as the web client signs it
+    query = urlencode(signed, quote_via=quote)
+    signed["w_rid"] = hashlib.md5((query + key).encode("utf-8")).hexdigest()
+    return signed
+
+
+def _key_name(url: str) -> str:
+    return url.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+class WbiKeys:
+    # img/sub key pair from the nav endpoint, cached on disk and refreshed
+    # once per day or when Bilibili rejects a signature.
+
+    def __init__(self, path: str = KEYS_PATH) -> None:
+        self.path = path
+        self._key: str | None = None
+        self._date: str | None = None
+        self._lock = threading.Lock()
+
+    def _today(self) -> str:
+        return dt.date.today().isoformat()
+
+    def _load_cached(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = load_file(self.path)
+            self._key = mixin_key(data["img_key"], data["sub_key"])
+            self._date = data.get("date")
+        except Exception:
+            self._key = None
+
+    def _fetch(self, http: HttpClient) -> None:
+        # nav answers -101 when logged out but still carries wbi_img
+        data = http.get_json(NAV_URL)
+        wbi = (data.get("data") or {}).get("wbi_img") or {}
+        img_key, sub_key = _key_name(wbi.get("img_url", "")), _key_name(wbi.get("sub_url", ""))
+        if not img_key or not sub_key:
+            raise RuntimeError(f"Bili WBI keys unavailable: {data}")
+        self._key = mixin_key(img_key, sub_key)
+        self._date = self._today()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        dump_file(tmp, {"img_key": img_key, "sub_key": sub_key, "date": self._date})
+        os.replace(tmp, self.path)
+
+    def get(self, http: HttpClient) -> str:
+        with self._lock:
+            if self._key is None:
+                self._load_cached()
+            if self._key is None or self._date != self._today():
+                self._fetch(http)
+            return self._key
+
+    def refresh(self, http: HttpClient, stale: str) -> str:
+        # concurrent callers rejected with the same key trigger a single fetch
+        with self._lock:
+            if self._key == stale:
+                self._fetch(http)
+            return self._key
+
+
+_keys = WbiKeys()
+
+
+def get_wbi_keys() -> WbiKeys:
+    return _keys